@@ -0,0 +1,100 @@
+import copy
+import logging
+import random
+import time
+
+import torch
+
+from data.data_source import load_data
+from sub_ocr.metrics.eval_det_iou import DetectionIoUEvaluator
+from sub_ocr.subtitle_ocr import SubtitleOCR, compare_ocr
+from sub_ocr.utils import load_image, pascal_voc_bb
+from utilities.logger_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+@torch.no_grad()
+def det_predictions(reader: SubtitleOCR, image_data: list) -> list:
+    """
+    Run the detection model once for each image, so only the post process is timed.
+    :return: Prediction, original image shape and ground truth labels of each image.
+    """
+    predictions = []
+    for image_path, labels in image_data:
+        image = load_image(str(image_path))
+        resized_image = torch.from_numpy(reader.det_image_resize(image)[None]).to(reader.device)
+        predictions.append((reader.det_model(resized_image), image.shape[:2], labels))
+    return predictions
+
+
+def benchmark_det_post_process(lang: str, model_dir: str, num_images: int = 100, downsamples: tuple = (1, 2, 4),
+                               seed: int = 31) -> dict:
+    """
+    Measure the latency and accuracy of the detection post process for each downsample factor of the probability map.
+    The accuracy is measured against the ground truth bboxes of the validation data.
+    :return: Precision, recall, hmean and post process milliseconds per image of each downsample factor.
+    """
+    reader = SubtitleOCR(lang, model_dir, "cpu")
+    image_data = load_data(lang, "det", "val")
+    image_data = random.Random(seed).sample(image_data, min(num_images, len(image_data)))
+    predictions, evaluator, results = det_predictions(reader, image_data), DetectionIoUEvaluator(), {}
+
+    for downsample in downsamples:
+        post_process = copy.copy(reader.det_post_process)
+        post_process.downsample = downsample
+        elapsed_time, raw_metrics = 0, []
+        for prediction, image_shape, labels in predictions:
+            start = time.perf_counter()
+            (bboxes,), (scores,) = post_process({"shape": [image_shape]}, prediction)
+            elapsed_time += time.perf_counter() - start
+            raw_metrics.append(evaluator.evaluate_image(labels, [{"bbox": bbox} for bbox in bboxes[scores > 0]]))
+        results[downsample] = evaluator.combine_results(raw_metrics)
+        results[downsample]["ms_per_image"] = elapsed_time / len(predictions) * 1000
+        logger.info(f"Downsample: {downsample}, Results: {results[downsample]}")
+    return results
+
+
+def rec_images(lang: str, num_images: int, seed: int) -> list:
+    """
+    Draw random images from the recognition validation data. The text of each bbox is cropped.
+    """
+    image_data = load_data(lang, "rec", "val")
+    images = []
+    for image_path, labels in random.Random(seed).sample(image_data, min(num_images, len(image_data))):
+        image = load_image(str(image_path))
+        for label in labels:
+            if label["bbox"]:
+                x_min, y_min, x_max, y_max = map(int, pascal_voc_bb(label["bbox"]))
+                images.append(image[y_min:y_max, x_min:x_max])
+            else:
+                images.append(image)
+    return [image for image in images if image.size]
+
+
+def benchmark_dynamic_quantization(lang: str, model_dir: str, num_images: int = 100, seed: int = 31) -> dict:
+    """
+    Measure the recognition accuracy of the dynamic quantized models against the fp32 models.
+    :return: Fraction of images with the exact same text and the mean text similarity ratio of the images.
+    """
+    images = rec_images(lang, num_images, seed)
+    reference, candidate = SubtitleOCR(lang, model_dir, "cpu"), SubtitleOCR(lang, model_dir, "cpu", quantize="dynamic")
+    results = compare_ocr(reference, candidate, images, det=False)
+    logger.info(f"Dynamic Quantization, Images: {len(images):,}, Results: {results}")
+    return results
+
+
+def main() -> None:
+    """
+    Setup benchmarks from here.
+    """
+    model_dir, lang = "saved models", "ch"
+    benchmark_det_post_process(lang, model_dir)
+    benchmark_dynamic_quantization(lang, model_dir)
+
+
+if __name__ == '__main__':
+    setup_logging("benchmark")
+    logger.debug("Logging Started")
+    main()
+    logger.debug("Logging Ended")
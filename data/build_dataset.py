@@ -102,9 +102,13 @@ class TextDetectionDataset(Dataset):
             # the x, y coordinates will not be allowed to be out of bounds or negative to prevent errors.
             image_labels = [{'bbox': [(min(max(0, x), image_width), min(max(0, y), image_height)) for x, y in
                                       label["bbox"]]} for label in image_labels]
-        image, scale = resize_norm_img(image, self.image_height, self.image_width)
+        resized_image, scale = resize_norm_img(image, self.image_height, self.image_width)
+        # shape of the resized image without its padding, the predictions are clipped to it during validation.
+        valid_shape = [min(round(image.shape[0] * scale), self.image_height),
+                       min(round(image.shape[1] * scale), self.image_width)]
         image_labels = [{"bbox": rescale(scale, bbox=label["bbox"])} for label in image_labels]
-        data = {"image_path": str(image_path), "image": image, "bboxes": [ann["bbox"] for ann in image_labels]}
+        data = {"image_path": str(image_path), "image": resized_image, "bboxes": [ann["bbox"] for ann in image_labels],
+                "valid_shape": valid_shape}
         if self.preprocesses:
             for process in self.preprocesses:
                 process(data)
@@ -0,0 +1,74 @@
+import logging
+import random
+from itertools import batched
+
+import torch
+
+from data.data_source import load_data
+from sub_ocr.modeling import convert_static_quantization, prepare_static_quantization
+from sub_ocr.subtitle_ocr import SubtitleOCR
+from sub_ocr.utils import load_image, pascal_voc_bb
+from utilities.logger_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+
+def calibration_images(lang: str, model_type: str, num_images: int, seed: int = 31) -> list:
+    """
+    Draw random images from the training data. The text of each bbox is cropped for the recognition images, labels
+    without a bbox use the whole image.
+    """
+    image_data = load_data(lang, model_type, "train")
+    images = []
+    for image_path, labels in random.Random(seed).sample(image_data, min(num_images, len(image_data))):
+        image = load_image(str(image_path))
+        if model_type != "rec":
+            images.append(image)
+            continue
+        for label in labels:
+            if label["bbox"]:
+                x_min, y_min, x_max, y_max = map(int, pascal_voc_bb(label["bbox"]))
+                images.append(image[y_min:y_max, x_min:x_max])
+            else:
+                images.append(image)
+    return [image for image in images if image.size]
+
+
+def quantize_models(lang: str, model_dir: str, num_images: int = 300, batch_size: int = 8) -> None:
+    """
+    Calibrate the detection and recognition models with images from the training data and save the static quantized
+    models, so they can be loaded with SubtitleOCR(quantize="static").
+    The calibration images are preprocessed the same way as they will be during inference.
+    """
+    reader = SubtitleOCR(lang, model_dir, "cpu")
+    for model_type in ["det", "rec"]:
+        config_name, params = reader.default_configs[f"{model_type}_{lang}"], getattr(reader, f"{model_type}_params")
+        images = calibration_images(lang, model_type, num_images)
+        logger.info(f"Calibrating {config_name} with {len(images):,} images...")
+
+        inputs = torch.rand(1, 3, params["height"], params["width"])
+        model = prepare_static_quantization(getattr(reader, f"{model_type}_model"), inputs)
+        setattr(reader, f"{model_type}_model", model)
+        for batch in batched(images, batch_size):
+            reader.ocr_frames(list(batch), det=model_type == "det", rec=model_type == "rec")
+        model = convert_static_quantization(model)
+
+        model_file = reader.quantized_model_file(config_name)
+        model_file.parent.mkdir(exist_ok=True)
+        torch.save(model.state_dict(), model_file)
+        logger.info(f"Static quantized model saved. Model File: {model_file}")
+
+
+def main() -> None:
+    """
+    Setup quantization from here.
+    """
+    model_dir, lang = "saved models", "ch"
+    quantize_models(lang, model_dir)
+
+
+if __name__ == '__main__':
+    setup_logging("quantization")
+    logger.debug("Logging Started")
+    main()
+    logger.debug("Logging Ended")
@@ -16,6 +16,7 @@ setup(
         "torchvision-0.19.1%2Bcu124-cp312-cp312-win_amd64.whl ;platform_system=='Windows'",
         "torchvision;platform_system!='Windows'", "opencv-python", "shapely", "pyclipper",
     ],
+    extras_require={"onnx": ["onnx", "onnxruntime"]},
     url="https://github.com/voun7/Subtitle_OCR",
     license="",
     author="Victor N",
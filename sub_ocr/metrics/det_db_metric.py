@@ -1,3 +1,5 @@
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import torch
 
@@ -25,8 +27,13 @@ class AverageMeter:
 
 
 class QuadMetrics:
-    def __init__(self):
+    def __init__(self, num_workers: int = 0):
+        """
+        :param num_workers: Number of processes used to evaluate the images in gather_measure. 0 evaluates them in the
+            main process.
+        """
         self.evaluator = DetectionIoUEvaluator()
+        self.num_workers = num_workers
 
     def measure(self, batch, output, box_thresh=0.6):
         """
@@ -35,25 +42,41 @@ class QuadMetrics:
             image: tensor of shape (N, C, H, W).
             polygons: tensor of shape (N, K, 4, 2), the polygons of objective regions.
             shape: the original shape of images.
+            valid_shape: [if exists] shape of the images without their padding.
             filename: the original filenames of images.
         output: (polygons, ...)
+        The gt and pred bboxes of each image are returned, they are evaluated at once by gather_measure.
+        The images of a batch can have a different number of predictions. The predictions of padded images are clipped
+        to the image without its padding, as they are during inference.
         """
         results = []
         bbox_batch = batch['bboxes']
-        prediction_bbox_batch = np.array(output[0])
-        prediction_scores_batch = np.array(output[1])
-        for polygons, prediction_polygons, prediction_scores in zip(bbox_batch, prediction_bbox_batch,
-                                                                    prediction_scores_batch):
+        valid_shapes = batch.get('valid_shape', [None] * len(bbox_batch))
+        for polygons, prediction_polygons, prediction_scores, valid_shape in zip(bbox_batch, output[0], output[1],
+                                                                                 valid_shapes):
             gt = [dict(bbox=np.int64(polygons[i])) for i in range(len(polygons))]
-            pred = []
-            for i in range(prediction_polygons.shape[0]):
-                if prediction_scores[i] >= box_thresh:
-                    pred.append(dict(bbox=prediction_polygons[i, :, :].astype(np.int32)))
-            results.append(self.evaluator.evaluate_image(gt, pred))
+            prediction_polygons = np.asarray(prediction_polygons, dtype=np.int32)
+            if valid_shape is not None:
+                valid_height, valid_width = valid_shape
+                prediction_polygons[:, :, 0] = np.clip(prediction_polygons[:, :, 0], 0, valid_width)
+                prediction_polygons[:, :, 1] = np.clip(prediction_polygons[:, :, 1], 0, valid_height)
+            pred = [dict(bbox=bbox) for bbox in prediction_polygons[np.asarray(prediction_scores) >= box_thresh]]
+            results.append((gt, pred))
         return results
 
     def gather_measure(self, raw_metrics):
-        raw_metrics = [image_metrics for batch_metrics in raw_metrics for image_metrics in batch_metrics]
+        """
+        raw_metrics: the measure results of every batch.
+        The images are evaluated across a process pool when num_workers is set.
+        """
+        image_bboxes = [image_bboxes for batch_bboxes in raw_metrics for image_bboxes in batch_bboxes]
+        gts, preds = [gt for gt, _ in image_bboxes], [pred for _, pred in image_bboxes]
+        if self.num_workers > 0:
+            with ProcessPoolExecutor(self.num_workers) as executor:
+                chunk_size = max(len(gts) // (self.num_workers * 4), 1)
+                raw_metrics = list(executor.map(self.evaluator.evaluate_image, gts, preds, chunksize=chunk_size))
+        else:
+            raw_metrics = list(map(self.evaluator.evaluate_image, gts, preds))
 
         result = self.evaluator.combine_results(raw_metrics)
 
@@ -71,24 +94,24 @@ class QuadMetrics:
 class RunningScore:
     def __init__(self, n_classes):
         self.n_classes = n_classes
-        self.confusion_matrix = np.zeros((n_classes, n_classes))
+        self.confusion_matrix = torch.zeros((n_classes, n_classes), dtype=torch.int64)
 
     def _fast_hist(self, label_true, label_pred, n_class):
+        """
+        Bincount of the label pairs on the device of the labels. scatter_add_ is used because torch.bincount copies
+        the max label to the host, the labels outside the classes are counted with a weight of 0.
+        """
         mask = (label_true >= 0) & (label_true < n_class)
-
-        if np.sum((label_pred[mask] < 0)) > 0:
-            print(label_pred[label_pred < 0])
-        hist = np.bincount(n_class * label_true[mask].astype(int) +
-                           label_pred[mask], minlength=n_class ** 2).reshape(n_class, n_class)
-        return hist
+        index = (n_class * label_true + label_pred).clamp(0, n_class ** 2 - 1)
+        hist = torch.zeros(n_class ** 2, dtype=torch.int64, device=index.device)
+        return hist.scatter_add_(0, index, mask.to(torch.int64)).reshape(n_class, n_class)
 
     def update(self, label_trues, label_preds):
-        for lt, lp in zip(label_trues, label_preds):
-            try:
-                self.confusion_matrix += self._fast_hist(lt.flatten(), lp.flatten(), self.n_classes)
-            except Exception as e:
-                print(e)
-                pass
+        """
+        The labels of the whole batch are counted at once, the confusion matrix stays on the device of the labels.
+        """
+        hist = self._fast_hist(label_trues.flatten(), label_preds.flatten(), self.n_classes)
+        self.confusion_matrix = self.confusion_matrix.to(hist.device) + hist
 
     def get_scores(self):
         """
@@ -97,19 +120,21 @@ class RunningScore:
         - mean accuracy
         - mean IU
         - fwavacc
+        The scores are tensors on the device of the confusion matrix, they are copied to the host when they are logged.
         """
-        hist = self.confusion_matrix
-        acc = np.diag(hist).sum() / (hist.sum() + 0.0001)
-        acc_cls = np.diag(hist) / (hist.sum(axis=1) + 0.0001)
-        acc_cls = np.nanmean(acc_cls)
-        iu = np.diag(hist) / (hist.sum(axis=1) + hist.sum(axis=0) - np.diag(hist) + 0.0001)
-        mean_iu = np.nanmean(iu)
+        hist = self.confusion_matrix.double()
+        acc = torch.diag(hist).sum() / (hist.sum() + 0.0001)
+        acc_cls = torch.diag(hist) / (hist.sum(dim=1) + 0.0001)
+        acc_cls = torch.nanmean(acc_cls)
+        iu = torch.diag(hist) / (hist.sum(dim=1) + hist.sum(dim=0) - torch.diag(hist) + 0.0001)
+        mean_iu = torch.nanmean(iu)
         return {'Overall Acc': acc, 'Mean Acc': acc_cls, 'Mean IoU': mean_iu}
 
     def reset(self):
-        self.confusion_matrix = np.zeros((self.n_classes, self.n_classes))
+        self.confusion_matrix = torch.zeros((self.n_classes, self.n_classes), dtype=torch.int64)
 
 
+@torch.no_grad()
 def cal_text_score(texts, gt_texts, training_masks, running_metric_text, thresh=0.5):
     """
     :param texts: preb_prob_map
@@ -117,22 +142,21 @@ def cal_text_score(texts, gt_texts, training_masks, running_metric_text, thresh=
     :param training_masks: supervision map
     :param running_metric_text:
     :param thresh:
+    The maps are thresholded and counted on their device, nothing is copied to the host.
     """
-    training_masks = training_masks.data.cpu().numpy()
-    pred_text = texts.data.cpu().numpy() * training_masks
-    pred_text[pred_text <= thresh] = 0
-    pred_text[pred_text > thresh] = 1
-    pred_text = pred_text.astype(np.int32)
-    gt_text = gt_texts.data.cpu().numpy() * training_masks
-    gt_text = gt_text.astype(np.int32)
+    pred_text = (texts * training_masks > thresh).long()
+    gt_text = (gt_texts * training_masks).long()
     running_metric_text.update(gt_text, pred_text)
     score_text = running_metric_text.get_scores()
     return score_text
 
 
 class DBMetric:
-    def __init__(self, post_processor, no_classes: int = 2) -> None:
-        self.post_process, self.quad_metrics = post_processor, QuadMetrics()
+    def __init__(self, post_processor, no_classes: int = 2, num_workers: int = 0) -> None:
+        """
+        :param num_workers: Number of processes used to evaluate the validation images at the end of each epoch.
+        """
+        self.post_process, self.quad_metrics = post_processor, QuadMetrics(num_workers)
         self.running_metric_text, self.raw_metrics = RunningScore(no_classes), []
 
     def __call__(self, predictions: torch.Tensor, batch: dict, validation: bool) -> dict:
@@ -140,7 +164,7 @@ class DBMetric:
                                           self.running_metric_text, thresh=0.25)
         accuracy, iou_shrink_map = score_shrink_map['Mean Acc'], score_shrink_map['Mean IoU']
         if validation:
-            assert predictions.size(1) == 2 and predictions.size(0) == 1, "Validation batch size must be 1!"
+            # each image of the batch is post processed with its own shape from batch['shape'].
             bboxes, scores = self.post_process(batch, predictions)
             raw_metric = self.quad_metrics.measure(batch, (bboxes, scores))
             self.raw_metrics.append(raw_metric)
@@ -1,4 +1,6 @@
 import numpy as np
+import shapely
+from shapely import STRtree
 from shapely.geometry import Polygon
 
 """
@@ -12,87 +14,44 @@ class DetectionIoUEvaluator:
         self.iou_constraint = iou_constraint
         self.area_precision_constraint = area_precision_constraint
 
-    def evaluate_image(self, gt, pred):
-        def get_union(pD, pG):
-            return Polygon(pD).union(Polygon(pG)).area
-
-        def get_intersection_over_union(pD, pG):
-            return get_intersection(pD, pG) / get_union(pD, pG)
-
-        def get_intersection(pD, pG):
-            return Polygon(pD).intersection(Polygon(pG)).area
-
-        matchedSum = 0
-
-        numGlobalCareGt = 0
-        numGlobalCareDet = 0
+    @staticmethod
+    def valid_polygons(items):
+        """
+        Polygons of the bboxes of the items, built once per image. Invalid polygons are removed.
+        """
+        polygons = np.array([Polygon(item["bbox"]) for item in items], dtype=object)
+        return polygons[shapely.is_valid(polygons)] if len(polygons) else polygons
+
+    @staticmethod
+    def iou_matrix(gtPols, detPols):
+        """
+        IoU of every gt and det polygon. Only the pairs with overlapping bounding boxes are intersected, all of them
+        with a single call.
+        """
+        iouMat = np.zeros([len(gtPols), len(detPols)])
+        gtNums, detNums = STRtree(detPols).query(gtPols)
+        intersections = shapely.area(shapely.intersection(gtPols[gtNums], detPols[detNums]))
+        unions = shapely.area(gtPols[gtNums]) + shapely.area(detPols[detNums]) - intersections
+        iouMat[gtNums, detNums] = np.divide(intersections, unions, out=np.zeros_like(unions), where=unions > 0)
+        return iouMat
 
+    def evaluate_image(self, gt, pred):
+        gtPols = self.valid_polygons(gt)
+        detPols = self.valid_polygons(pred)
         detMatched = 0
 
-        gtPols = []
-        detPols = []
-
-        gtPolPoints = []
-        detPolPoints = []
-
-        pairs = []
-        detMatchedNums = []
-
-        evaluationLog = ""
-
-        for n in range(len(gt)):
-            points = gt[n]["bbox"]
-            if not Polygon(points).is_valid:
-                continue
-
-            gtPol = points
-            gtPols.append(gtPol)
-            gtPolPoints.append(points)
-
-        evaluationLog += "GT polygons: " + str(len(gtPols))
-
-        for n in range(len(pred)):
-            points = pred[n]["bbox"]
-            if not Polygon(points).is_valid:
-                continue
-
-            detPol = points
-            detPols.append(detPol)
-            detPolPoints.append(points)
-
-        evaluationLog += "DET polygons: " + str(len(detPols))
-
         if len(gtPols) > 0 and len(detPols) > 0:
-            # Calculate IoU and precision matrix's
-            outputShape = [len(gtPols), len(detPols)]
-            iouMat = np.empty(outputShape)
+            iouMat = self.iou_matrix(gtPols, detPols)
             gtRectMat = np.zeros(len(gtPols), np.int8)
             detRectMat = np.zeros(len(detPols), np.int8)
-            for gtNum in range(len(gtPols)):
-                for detNum in range(len(detPols)):
-                    pG = gtPols[gtNum]
-                    pD = detPols[detNum]
-                    iouMat[gtNum, detNum] = get_intersection_over_union(pD, pG)
-
-            for gtNum in range(len(gtPols)):
-                for detNum in range(len(detPols)):
-                    if gtRectMat[gtNum] == 0 and detRectMat[detNum] == 0:
-                        if iouMat[gtNum, detNum] > self.iou_constraint:
-                            gtRectMat[gtNum] = 1
-                            detRectMat[detNum] = 1
-                            detMatched += 1
-                            pairs.append({"gt": gtNum, "det": detNum})
-                            detMatchedNums.append(detNum)
-                            evaluationLog += "Match GT #" + str(gtNum) + " with Det #" + str(detNum)
-
-        numGtCare = len(gtPols)
-        numDetCare = len(detPols)
-
-        matchedSum += detMatched
-        numGlobalCareGt += numGtCare
-        numGlobalCareDet += numDetCare
-
-        perSampleMetrics = {"gtCare": numGtCare, "detCare": numDetCare, "detMatched": detMatched, }
+            # the pairs are matched greedily in the order of the gt and then the det polygons
+            for gtNum, detNum in np.argwhere(iouMat > self.iou_constraint):
+                if gtRectMat[gtNum] == 0 and detRectMat[detNum] == 0:
+                    gtRectMat[gtNum] = 1
+                    detRectMat[detNum] = 1
+                    detMatched += 1
+
+        perSampleMetrics = {"gtCare": len(gtPols), "detCare": len(detPols), "detMatched": detMatched, }
         return perSampleMetrics
 
     def combine_results(self, results):
@@ -1 +1,4 @@
 from .architectures import build_model
+from .export import OnnxModel, export_onnx
+from .fusion import fuse_conv_bn, reparameterize
+from .quantization import convert_static_quantization, prepare_static_quantization
@@ -0,0 +1,43 @@
+"""
+Export of the models to onnx and inference of the exported models with onnxruntime.
+onnx and onnxruntime are optional dependencies, they are only imported when they are used.
+"""
+
+from pathlib import Path
+
+import torch
+import torch.nn as nn
+
+
+@torch.no_grad()
+def export_onnx(model: nn.Module, inputs: torch.Tensor, model_file: Path, dynamic_axes: dict) -> None:
+    """
+    Export the model to an onnx file.
+    :param model: Model in eval mode.
+    :param inputs: Sample input used to trace the model.
+    :param model_file: Onnx file location.
+    :param dynamic_axes: Axes of the image input and prediction output that can change size, e.g. batch and width.
+    """
+    assert not model.training, "Model must be in eval mode!"
+    torch.onnx.export(model, (inputs,), str(model_file), input_names=["image"], output_names=["prediction"],
+                      dynamic_axes=dynamic_axes, opset_version=17, dynamo=False)
+
+
+class OnnxModel:
+    def __init__(self, model_file: Path, num_threads: int = 0) -> None:
+        """
+        Run an exported model with the cpu provider of onnxruntime. It's called like the torch model it was exported
+        from, so the same post processors can be used with its predictions.
+        :param model_file: Onnx file location.
+        :param num_threads: Number of threads used by each operation. 0 lets onnxruntime choose.
+        """
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(str(model_file), options, providers=["CPUExecutionProvider"])
+
+    def __call__(self, inputs: torch.Tensor) -> torch.Tensor:
+        prediction = self.session.run(["prediction"], {"image": inputs.numpy()})[0]
+        return torch.from_numpy(prediction)
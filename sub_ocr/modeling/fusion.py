@@ -0,0 +1,139 @@
+"""
+Inference optimizations that fold the training time branches and batch norms of a model into its convolutions.
+The models must be in eval mode, the running statistics of the batch norms are used for the folding.
+"""
+
+from collections import Counter
+
+import torch
+import torch.nn as nn
+from torch.overrides import TorchFunctionMode
+from torchvision.ops import DeformConv2d
+
+# Layers that compute each output channel with a linear kernel, so a following batch norm can be folded into them.
+CONV_TYPES = (nn.Conv2d, nn.ConvTranspose2d, DeformConv2d)
+
+
+def flatten_tensors(args) -> list:
+    """
+    Get all the tensors in nested lists, tuples and dicts of function arguments.
+    """
+    if isinstance(args, torch.Tensor):
+        return [args]
+    if isinstance(args, (list, tuple)):
+        return [tensor for arg in args for tensor in flatten_tensors(arg)]
+    if isinstance(args, dict):
+        return [tensor for arg in args.values() for tensor in flatten_tensors(arg)]
+    return []
+
+
+class TensorUseCounter(TorchFunctionMode):
+    """
+    Count the number of torch operations that each tensor is used in as an input.
+    Only operations that return tensors are counted, so metadata calls like dim() and size() are ignored.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.uses = Counter()
+
+    def __torch_function__(self, func, types, args=(), kwargs=None):
+        output = func(*args, **(kwargs or {}))
+        outputs = flatten_tensors(output)
+        if outputs:
+            inputs = flatten_tensors((args, kwargs))
+            for tensor in inputs:
+                self.uses[id(tensor)] += 1
+            for tensor in outputs:
+                if not any(tensor is input_tensor for input_tensor in inputs):  # in-place outputs keep their count
+                    self.uses[id(tensor)] = 0  # the id of a freed tensor can be reused by a new tensor
+        return output
+
+
+def find_conv_bn_pairs(model: nn.Module, inputs: torch.Tensor) -> list:
+    """
+    Run the model once and find every conv layer whose output is used only by a BatchNorm2d.
+    :return: List of conv and batch norm module names.
+    """
+    module_names = {module: name for name, module in model.named_modules()}
+    calls, conv_outputs, bn_inputs = Counter(), {}, {}
+
+    def conv_hook(module, _, output):
+        calls[module] += 1
+        conv_outputs[module] = output
+
+    def bn_hook(module, args, _):
+        calls[module] += 1
+        bn_inputs[module] = args[0]
+
+    handles = []
+    for module in module_names:
+        if isinstance(module, CONV_TYPES):
+            handles.append(module.register_forward_hook(conv_hook))
+        elif isinstance(module, nn.BatchNorm2d):
+            handles.append(module.register_forward_hook(bn_hook))
+    try:
+        with torch.no_grad(), TensorUseCounter() as counter:
+            model(inputs)
+    finally:
+        for handle in handles:
+            handle.remove()
+
+    pairs = []
+    conv_modules = {id(output): conv for conv, output in conv_outputs.items()}
+    for bn, bn_input in bn_inputs.items():
+        conv = conv_modules.get(id(bn_input))
+        if conv is None or conv_outputs[conv] is not bn_input or calls[conv] != 1 or calls[bn] != 1:
+            continue
+        if counter.uses[id(bn_input)] == 1 and bn.track_running_stats:  # the batch norm is the only user
+            pairs.append((module_names[conv], module_names[bn]))
+    return pairs
+
+
+@torch.no_grad()
+def fold_conv_bn(conv: nn.Module, bn: nn.BatchNorm2d) -> None:
+    """
+    Fold the batch norm statistics and affine parameters into the weight and bias of the conv.
+    """
+    scale = torch.rsqrt(bn.running_var + bn.eps)
+    bias = -bn.running_mean * scale
+    if bn.affine:
+        scale, bias = scale * bn.weight, bias * bn.weight + bn.bias
+    if conv.bias is not None:
+        bias = bias + conv.bias * scale
+    if isinstance(conv, nn.ConvTranspose2d):  # weight shape is [in_channels, out_channels / groups, k, k]
+        in_channels, group_out_channels = conv.weight.shape[:2]
+        weight = conv.weight.view(conv.groups, in_channels // conv.groups, group_out_channels, -1)
+        weight.mul_(scale.reshape(conv.groups, 1, group_out_channels, 1))
+    else:  # weight shape is [out_channels, in_channels / groups, k, k]
+        conv.weight.mul_(scale.reshape(-1, 1, 1, 1))
+    conv.bias = nn.Parameter(bias)
+
+
+def fuse_conv_bn(model: nn.Module, inputs: torch.Tensor) -> int:
+    """
+    Fold every conv -> BatchNorm2d pair of the model and replace the batch norms with identity layers.
+    :param model: Model in eval mode.
+    :param inputs: Sample input used to trace which layers follow each other.
+    :return: Number of fused pairs.
+    """
+    assert not model.training, "Model must be in eval mode!"
+    pairs = find_conv_bn_pairs(model, inputs)
+    for conv_name, bn_name in pairs:
+        fold_conv_bn(model.get_submodule(conv_name), model.get_submodule(bn_name))
+        parent_name, _, attr_name = bn_name.rpartition(".")
+        setattr(model.get_submodule(parent_name), attr_name, nn.Identity())
+    return len(pairs)
+
+
+@torch.no_grad()
+def reparameterize(model: nn.Module) -> int:
+    """
+    Merge the branches of every reparameterizable layer (layers with a rep method) into a single conv.
+    :return: Number of reparameterized layers.
+    """
+    assert not model.training, "Model must be in eval mode!"
+    rep_layers = [module for module in model.modules() if callable(getattr(module, "rep", None))]
+    for layer in rep_layers:
+        layer.rep()
+    return len(rep_layers)
@@ -55,11 +55,14 @@ class DBHead(nn.Module):
         see https://arxiv.org/abs/1911.08947
     args:
         params(dict): super parameters for build DB network
+        infer_thresh(bool): the threshold map is also computed in eval mode. Only the shrink map is used for inference,
+            DBMetric and DBLoss validation need both maps.
     """
 
-    def __init__(self, in_channels, k=50):
+    def __init__(self, in_channels, k=50, infer_thresh=True):
         super().__init__()
         self.k = k
+        self.infer_thresh = infer_thresh
         self.binarize = Head(in_channels)
         self.thresh = Head(in_channels)
 
@@ -68,6 +71,8 @@ class DBHead(nn.Module):
 
     def forward(self, x):
         shrink_maps = self.binarize(x)
+        if not self.training and not self.infer_thresh:
+            return shrink_maps
         threshold_maps = self.thresh(x)
         if self.training:
             binary_maps = self.step_function(shrink_maps, threshold_maps)
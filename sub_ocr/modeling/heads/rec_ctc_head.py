@@ -1,8 +1,13 @@
+import torch
 import torch.nn as nn
 
 
 class CTCHead(nn.Module):
-    def __init__(self, in_channels, out_channels=6625, mid_channels=None):
+    def __init__(self, in_channels, out_channels=6625, mid_channels=None, infer_log_softmax=True):
+        """
+        infer_log_softmax: The log softmax is also applied in eval mode. The character with the highest score is the
+            same without it, CTCLabelDecode accepts both the log probabilities and the raw scores.
+        """
         super().__init__()
         if mid_channels is None:
             self.fc = nn.Linear(in_channels, out_channels, bias=True)
@@ -12,6 +17,17 @@ class CTCHead(nn.Module):
 
         self.out_channels = out_channels
         self.mid_channels = mid_channels
+        self.infer_log_softmax = infer_log_softmax
+
+    @torch.no_grad()
+    def select_classes(self, class_indexes):
+        """
+        Keep only the given output classes, for inference with a restricted character set.
+        """
+        fc = self.fc if self.mid_channels is None else self.fc2
+        class_indexes = torch.tensor(class_indexes, device=fc.weight.device)
+        fc.weight, fc.bias = nn.Parameter(fc.weight[class_indexes]), nn.Parameter(fc.bias[class_indexes])
+        fc.out_features = self.out_channels = len(class_indexes)
 
     def forward(self, x):
         if self.mid_channels is None:
@@ -21,5 +37,6 @@ class CTCHead(nn.Module):
             predicts = self.fc2(x)
 
         predicts = predicts.permute(1, 0, 2)  # B, T, C --> T, B, C  (Input sequence length, Batch size, No of classes)
-        predicts = predicts.log_softmax(2)
+        if self.training or self.infer_log_softmax:
+            predicts = predicts.log_softmax(2)
         return predicts
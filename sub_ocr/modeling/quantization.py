@@ -0,0 +1,46 @@
+"""
+Post training static int8 quantization of the models with fx graph mode.
+The conv, batch norm and relu layers are fused and observers are inserted to record the ranges of the activations
+while calibration images are passed through the prepared model. The recorded ranges are used when converting it.
+"""
+
+import torch
+import torch.nn as nn
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.fx.custom_config import PrepareCustomConfig
+from torch.ao.quantization.quantize_fx import convert_fx, prepare_fx
+from torch.fx import GraphModule
+
+from .fusion import reparameterize
+from .necks.rnn import EncoderWithSVTR, Im2Seq
+
+# Modules with control flow that depends on the input shape can not be traced, they are kept in float.
+NON_TRACEABLE_MODULES = [Im2Seq, EncoderWithSVTR]
+
+
+def quantized_engine() -> str:
+    """
+    Get the quantized engine for the cpu. x86 is used when it's available and qnnpack (arm) otherwise.
+    """
+    return "x86" if "x86" in torch.backends.quantized.supported_engines else "qnnpack"
+
+
+def prepare_static_quantization(model: nn.Module, inputs: torch.Tensor) -> GraphModule:
+    """
+    Reparameterize the model, fuse its layers and insert the observers for calibration.
+    :param model: Model in eval mode on the cpu. It will be modified.
+    :param inputs: Sample input used to trace the model.
+    :return: Prepared model, pass the calibration images through it before converting it.
+    """
+    assert not model.training, "Model must be in eval mode!"
+    engine = torch.backends.quantized.engine = quantized_engine()
+    reparameterize(model)
+    custom_config = PrepareCustomConfig().set_non_traceable_module_classes(NON_TRACEABLE_MODULES)
+    return prepare_fx(model, get_default_qconfig_mapping(engine), (inputs,), custom_config)
+
+
+def convert_static_quantization(model: GraphModule) -> GraphModule:
+    """
+    Convert a calibrated model to int8 with the activation ranges recorded by its observers.
+    """
+    return convert_fx(model)
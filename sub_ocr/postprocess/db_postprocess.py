@@ -3,9 +3,12 @@ This code is referred from:
 https://github.com/WenmuZhou/DBNet.pytorch/blob/master/post_processing/seg_detector_representer.py
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2 as cv
 import numpy as np
 import pyclipper
+import torch.nn.functional as F
 from shapely.geometry import Polygon
 
 
@@ -14,11 +17,23 @@ class DBPostProcess:
     The post process for Differentiable Binarization (DB).
     """
 
-    def __init__(self, thresh=0.3, box_thresh=0.7, max_candidates=1000, unclip_ratio=2):
+    def __init__(self, thresh=0.3, box_thresh=0.7, max_candidates=1000, unclip_ratio=2, axis_aligned=False,
+                 downsample=1, num_threads=1):
+        """
+        axis_aligned: the boxes are the bounding boxes of the text regions, expanded the same way as the rotated
+            rectangles. No contours are computed, for horizontal text.
+        downsample: the probability map is average pooled by this factor before it's binarized, so the components and
+            contours are found on a smaller map. The boxes are scaled back with the size of the map.
+        num_threads: the images of a batch are post processed by this many threads. Most of the time is spent in
+            opencv and numpy calls that release the GIL, so the images are processed in parallel.
+        """
         self.thresh = thresh
         self.box_thresh = box_thresh
         self.max_candidates = max_candidates
         self.un_clip_ratio = unclip_ratio
+        self.axis_aligned = axis_aligned
+        self.downsample = downsample
+        self.num_threads = num_threads
         self.min_size = 3
 
     def __call__(self, batch, prediction, is_output_polygon=False):
@@ -35,20 +50,25 @@ class DBPostProcess:
             thresh: [if exists] thresh hold prediction with shape (N, H, W)
             thresh_binary: [if exists] binarized with threshold, (N, H, W)
         """
+        prediction = prediction[:, :1, :, :]
+        if self.downsample > 1:
+            prediction = F.avg_pool2d(prediction, self.downsample, ceil_mode=True)
         prediction = prediction[:, 0, :, :]
         segmentation = self.binarize(prediction)
-        boxes_batch = []
-        scores_batch = []
-        for batch_index in range(prediction.size(0)):
+        from_bitmap = self.polygons_from_bitmap if is_output_polygon else self.boxes_from_bitmap
+
+        def post_process_image(batch_index):
             height, width = batch['shape'][batch_index]
-            if is_output_polygon:
-                boxes, scores = self.polygons_from_bitmap(prediction[batch_index], segmentation[batch_index], width,
-                                                          height)
-            else:
-                boxes, scores = self.boxes_from_bitmap(prediction[batch_index], segmentation[batch_index], width,
-                                                       height)
-            boxes_batch.append(boxes)
-            scores_batch.append(scores)
+            return from_bitmap(prediction[batch_index], segmentation[batch_index], width, height)
+
+        batch_size = prediction.size(0)
+        if self.num_threads > 1 and batch_size > 1:
+            with ThreadPoolExecutor(min(self.num_threads, batch_size)) as executor:
+                results = list(executor.map(post_process_image, range(batch_size)))
+        else:
+            results = [post_process_image(batch_index) for batch_index in range(batch_size)]
+        boxes_batch = [boxes for boxes, _ in results]
+        scores_batch = [scores for _, scores in results]
         return boxes_batch, scores_batch
 
     def binarize(self, prediction):
@@ -90,7 +110,7 @@ class DBPostProcess:
             if sside < self.min_size + 2:
                 continue
 
-            if not isinstance(dest_width, int):
+            if not isinstance(dest_width, (int, float)):
                 dest_width = dest_width.item()
                 dest_height = dest_height.item()
 
@@ -103,40 +123,107 @@ class DBPostProcess:
     def boxes_from_bitmap(self, prediction, _bitmap, dest_width, dest_height):
         """
         _bitmap: single map with shape (H, W), whose values are binarized as {0, 1}
+        The bitmap is labeled once with connected components and the mean score of every component is computed with a
+        single bincount. Components with a low score or that are too small are removed before the geometry of the
+        remaining components is computed. Their min area rects, or bounding boxes when axis aligned, are expanded and
+        converted to boxes for all of them at once.
         """
         assert len(_bitmap.shape) == 2
-        bitmap = _bitmap.cpu().numpy()  # The first channel
+        foreground = _bitmap.cpu().numpy().astype(bool)  # The first channel
         prediction = prediction.cpu().detach().numpy()
-        height, width = bitmap.shape
-        contours, _ = cv.findContours((bitmap * 255).astype(np.uint8), cv.RETR_LIST, cv.CHAIN_APPROX_SIMPLE)
-        num_contours = min(len(contours), self.max_candidates)
-        boxes = np.zeros((num_contours, 4, 2), dtype=np.int16)
-        scores = np.zeros((num_contours,), dtype=np.float32)
-
-        for index in range(num_contours):
-            contour = contours[index].squeeze(1)
-            points, sside = self.get_mini_boxes(contour)
-            if sside < self.min_size:
-                continue
-            points = np.array(points)
-            score = self.box_score_fast(prediction, contour)
-            if self.box_thresh > score:
-                continue
+        height, width = foreground.shape
+        num_labels, labels, stats, _ = cv.connectedComponentsWithStats(foreground.view(np.uint8), connectivity=8)
+        label_areas = np.maximum(stats[:, cv.CC_STAT_AREA], 1)
+        label_scores = np.bincount(labels[foreground], prediction[foreground], num_labels) / label_areas
+        # the short side of the min area rect of a component is not larger than its bbox.
+        label_sizes = np.maximum(stats[:, cv.CC_STAT_WIDTH], stats[:, cv.CC_STAT_HEIGHT]) * self.downsample - 1
+        candidates = np.flatnonzero((label_scores >= self.box_thresh) & (label_sizes >= self.min_size))
+        candidates = candidates[candidates > 0][:self.max_candidates]  # label 0 is the background
+        if self.axis_aligned:
+            rects = self.bounding_rects(stats[candidates])
+        else:
+            rects = self.min_area_rects(labels, stats, candidates)
+        if self.downsample > 1:  # a pixel of the downsampled map covers downsample pixels of the full size map
+            rects[:, :2] = (rects[:, :2] + 0.5) * self.downsample - 0.5
+            rects[:, 2:4] = rects[:, 2:4] * self.downsample + self.downsample - 1
+            height, width = height * self.downsample, width * self.downsample
 
-            box = self.un_clip(points, self.un_clip_ratio).reshape(-1, 1, 2)
-            box, sside = self.get_mini_boxes(box)
-            if sside < self.min_size + 2:
-                continue
-            box = np.array(box)
-            if not isinstance(dest_width, int):
-                dest_width = dest_width.item()
-                dest_height = dest_height.item()
+        valid = rects[:, 2:4].min(1) >= self.min_size
+        rects, scores = self.un_clip_rects(rects[valid], self.un_clip_ratio), label_scores[candidates[valid]]
+        valid = rects[:, 2:4].min(1) >= self.min_size + 2
+        boxes, scores = self.order_points(self.rect_points(rects[valid])), scores[valid].astype(np.float32)
+        if not isinstance(dest_width, (int, float)):
+            dest_width = dest_width.item()
+            dest_height = dest_height.item()
 
-            box[:, 0] = np.clip(np.round(box[:, 0] / width * dest_width), 0, dest_width)
-            box[:, 1] = np.clip(np.round(box[:, 1] / height * dest_height), 0, dest_height)
-            boxes[index, :, :] = box.astype(np.int16)
-            scores[index] = score
-        return boxes, scores
+        boxes[:, :, 0] = np.clip(np.round(boxes[:, :, 0] / width * dest_width), 0, dest_width)
+        boxes[:, :, 1] = np.clip(np.round(boxes[:, :, 1] / height * dest_height), 0, dest_height)
+        return boxes.astype(np.int16), scores
+
+    @staticmethod
+    def min_area_rects(labels, stats, candidates):
+        """
+        Min area rects of the outer contours of the candidate components with shape (N, 5), as center x, center y,
+        width, height and angle.
+        """
+        rects = np.zeros((len(candidates), 5), dtype=np.float32)
+        for index, label in enumerate(candidates):
+            x, y, w, h = stats[label, :4]
+            mask = (labels[y:y + h, x:x + w] == label).astype(np.uint8)
+            contours, _ = cv.findContours(mask, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE, offset=(int(x), int(y)))
+            (center_x, center_y), (rect_w, rect_h), angle = cv.minAreaRect(contours[0])
+            rects[index] = center_x, center_y, rect_w, rect_h, angle
+        return rects
+
+    @staticmethod
+    def bounding_rects(stats):
+        """
+        Bounding boxes of the components through their pixel centers with shape (N, 5), in the same format as
+        min_area_rects.
+        """
+        x, y = stats[:, cv.CC_STAT_LEFT], stats[:, cv.CC_STAT_TOP]
+        width, height = stats[:, cv.CC_STAT_WIDTH] - 1, stats[:, cv.CC_STAT_HEIGHT] - 1
+        angle = np.zeros(len(stats))
+        return np.stack([x + width / 2, y + height / 2, width, height, angle], 1).astype(np.float32)
+
+    @staticmethod
+    def un_clip_rects(rects, un_clip_ratio):
+        """
+        rects: array of rotated rectangles with shape (N, 5), as center x, center y, width, height and angle.
+        Offsetting a rectangle by the un_clip distance with round joins and taking the min area rect of the result, as
+        un_clip and get_mini_boxes do, grows both sides of the rectangle by twice the distance.
+        """
+        rects = rects.copy()
+        width, height = rects[:, 2], rects[:, 3]
+        distance = width * height * un_clip_ratio / np.maximum(2 * (width + height), 1e-6)
+        rects[:, 2:4] += 2 * distance[:, None]
+        return rects
+
+    @staticmethod
+    def rect_points(rects):
+        """
+        Corner points of the rotated rectangles with shape (N, 4, 2), computed the same way as cv.boxPoints.
+        """
+        center_x, center_y, width, height, angle = rects.T
+        angle = np.deg2rad(angle)
+        a, b = np.sin(angle) * 0.5, np.cos(angle) * 0.5
+        point_0 = np.stack([center_x - a * height - b * width, center_y + b * height - a * width], 1)
+        point_1 = np.stack([center_x + a * height - b * width, center_y - b * height - a * width], 1)
+        center = rects[:, :2]
+        return np.stack([point_0, point_1, 2 * center - point_0, 2 * center - point_1], 1)
+
+    @staticmethod
+    def order_points(points):
+        """
+        Order the corner points of every box the same way as get_mini_boxes, (N, 4, 2) -> (N, 4, 2).
+        """
+        points = np.take_along_axis(points, np.argsort(points[:, :, 0], 1, kind="stable")[:, :, None], 1)
+        left_swap = points[:, 1, 1] <= points[:, 0, 1]
+        right_swap = points[:, 3, 1] <= points[:, 2, 1]
+        index_1, index_4 = left_swap.astype(int), 1 - left_swap
+        index_2, index_3 = 2 + right_swap, 3 - right_swap
+        order = np.stack([index_1, index_2, index_3, index_4], 1)
+        return np.take_along_axis(points, order[:, :, None], 1)
 
     @staticmethod
     def un_clip(box, un_clip_ratio):
@@ -3,25 +3,51 @@ Locality aware nms.
 """
 
 import numpy as np
+import shapely
 from shapely.geometry import Polygon
 
 
+def quad_polygons(quads):
+    """
+    Polygons of the first 8 coordinates of the N x 9 quads, made valid with buffer(0).
+    """
+    quads = np.asarray(quads, dtype=np.float64)
+    return shapely.buffer(shapely.polygons(quads[:, :8].reshape((-1, 4, 2))), 0)
+
+
+def overlapping_bounds(bounds, i, indexes):
+    """
+    Mask of the pairs of i and indexes whose axis aligned bounds (min x, min y, max x, max y) overlap.
+    """
+    g, p = bounds[i], bounds[indexes]
+    return ((g[..., 0] <= p[..., 2]) & (p[..., 0] <= g[..., 2]) &
+            (g[..., 1] <= p[..., 3]) & (p[..., 1] <= g[..., 3]))
+
+
+def iou_row(polygons, areas, bounds, i, indexes):
+    """
+    IoU of polygon i with the polygons at the indexes, computed with the vectorized shapely functions. i can also
+    index as many polygons as the indexes, for the IoU of each pair.
+    Only the pairs with overlapping bounds are intersected, the IoU of the other pairs is 0.
+    """
+    all_indexes = np.arange(len(polygons))
+    indexes = all_indexes[indexes]
+    i = np.broadcast_to(all_indexes[i], indexes.shape)
+    overlap = overlapping_bounds(bounds, i, indexes)
+    i, indexes = i[overlap], indexes[overlap]
+    inter = shapely.area(shapely.intersection(polygons[i], polygons[indexes]))
+    union = areas[i] + areas[indexes] - inter
+    ious = np.zeros(overlap.shape)
+    ious[overlap] = np.divide(inter, union, out=np.zeros_like(union), where=union > 0)
+    return ious
+
+
 def intersection(g, p):
     """
     Intersection.
     """
-    g = Polygon(g[:8].reshape((4, 2)))
-    p = Polygon(p[:8].reshape((4, 2)))
-    g = g.buffer(0)
-    p = p.buffer(0)
-    if not g.is_valid or not p.is_valid:
-        return 0
-    inter = Polygon(g).intersection(Polygon(p)).area
-    union = g.area + p.area - inter
-    if union == 0:
-        return 0
-    else:
-        return inter / union
+    polygons = quad_polygons([g, p])
+    return iou_row(polygons, shapely.area(polygons), shapely.bounds(polygons), 0, [1])[0]
 
 
 def intersection_iog(g, p):
@@ -55,46 +81,29 @@ def standard_nms(S, thres):
     """
     Standard nms.
     """
-    order = np.argsort(S[:, 8])[::-1]
-    keep = []
-    while order.size > 0:
-        i = order[0]
-        keep.append(i)
-        ovr = np.array([intersection(S[i], S[t]) for t in order[1:]])
-
-        inds = np.where(ovr <= thres)[0]
-        order = order[inds + 1]
-
-    return S[keep]
+    return S[nms(S, thres)]
 
 
 def standard_nms_inds(S, thres):
     """
     Standard nms, retun inds.
     """
-    order = np.argsort(S[:, 8])[::-1]
-    keep = []
-    while order.size > 0:
-        i = order[0]
-        keep.append(i)
-        ovr = np.array([intersection(S[i], S[t]) for t in order[1:]])
-
-        inds = np.where(ovr <= thres)[0]
-        order = order[inds + 1]
-
-    return keep
+    return nms(S, thres)
 
 
 def nms(S, thres):
     """
     nms.
+    The IoU of the kept quad with all the remaining quads is computed at once in each iteration.
     """
+    polygons = quad_polygons(S)
+    areas, bounds = shapely.area(polygons), shapely.bounds(polygons)
     order = np.argsort(S[:, 8])[::-1]
     keep = []
     while order.size > 0:
         i = order[0]
         keep.append(i)
-        ovr = np.array([intersection(S[i], S[t]) for t in order[1:]])
+        ovr = iou_row(polygons, areas, bounds, i, order[1:])
 
         inds = np.where(ovr <= thres)[0]
         order = order[inds + 1]
@@ -110,63 +119,32 @@ def soft_nms(boxes_in, Nt_thres=0.3, threshold=0.8, sigma=0.5, method=2):
     :para Nt_thres, iou_threshi
     :para sigma, gaussian weght
     :method, linear or gaussian
+    The scores of all the remaining boxes are decayed at once with the IoU row of the max box.
     """
     boxes = boxes_in.copy()
-    N = boxes.shape[0]
-    if N is None or N < 1:
+    if boxes.shape[0] < 1:
         return np.array([])
-    pos, maxpos = 0, 0
-    weight = 0.0
-    inds = np.arange(N)
-    tbox, sbox = boxes[0].copy(), boxes[0].copy()
-    for i in range(N):
-        maxscore = boxes[i, 8]
-        maxpos = i
-        tbox = boxes[i].copy()
-        ti = inds[i]
-        pos = i + 1
-        # get max box
-        while pos < N:
-            if maxscore < boxes[pos, 8]:
-                maxscore = boxes[pos, 8]
-                maxpos = pos
-            pos = pos + 1
-        # add max box as a detection
-        boxes[i, :] = boxes[maxpos, :]
-        inds[i] = inds[maxpos]
-        # swap
-        boxes[maxpos, :] = tbox
-        inds[maxpos] = ti
-        tbox = boxes[i].copy()
-        pos = i + 1
+    polygons = quad_polygons(boxes)
+    areas, bounds = shapely.area(polygons), shapely.bounds(polygons)
+    remaining, keep = np.arange(boxes.shape[0]), []
+    while remaining.size > 0:
+        # get max box and add it as a detection
+        max_index = remaining[np.argmax(boxes[remaining, 8])]
+        keep.append(max_index)
+        remaining = remaining[remaining != max_index]
         # NMS iteration
-        while pos < N:
-            sbox = boxes[pos].copy()
-            ts_iou_val = intersection(tbox, sbox)
-            if ts_iou_val > 0:
-                if method == 1:
-                    if ts_iou_val > Nt_thres:
-                        weight = 1 - ts_iou_val
-                    else:
-                        weight = 1
-                elif method == 2:
-                    weight = np.exp(-1.0 * ts_iou_val ** 2 / sigma)
-                else:
-                    if ts_iou_val > Nt_thres:
-                        weight = 0
-                    else:
-                        weight = 1
-                boxes[pos, 8] = weight * boxes[pos, 8]
-                # if box score falls below thresold, discard the box by
-                # swaping last box update N
-                if boxes[pos, 8] < threshold:
-                    boxes[pos, :] = boxes[N - 1, :]
-                    inds[pos] = inds[N - 1]
-                    N = N - 1
-                    pos = pos - 1
-            pos = pos + 1
-
-    return boxes[:N]
+        ts_iou_val = iou_row(polygons, areas, bounds, max_index, remaining)
+        if method == 1:
+            weight = np.where(ts_iou_val > Nt_thres, 1 - ts_iou_val, 1)
+        elif method == 2:
+            weight = np.exp(-1.0 * ts_iou_val ** 2 / sigma)
+        else:
+            weight = np.where(ts_iou_val > Nt_thres, 0, 1)
+        boxes[remaining, 8] = weight * boxes[remaining, 8]
+        # discard the overlapping boxes whose score falls below threshold
+        remaining = remaining[(ts_iou_val <= 0) | (boxes[remaining, 8] >= threshold)]
+
+    return boxes[keep]
 
 
 def nms_locality(polys, thres=0.3):
@@ -174,11 +152,21 @@ def nms_locality(polys, thres=0.3):
     locality aware nms of EAST
     :param polys: a N*9 numpy array. first 8 coordinates, then prob
     :return: boxes after nms
+    The IoU of every quad with the previous quad is computed at once. It's only computed again for a quad that follows
+    a merge, since the merged quad has changed.
     """
     S = []
     p = None
-    for g in polys:
-        if p is not None and intersection(g, p) > thres:
+    if len(polys) > 1:
+        polygons = quad_polygons(polys)
+        areas, bounds = shapely.area(polygons), shapely.bounds(polygons)
+        previous_ious = iou_row(polygons, areas, bounds, slice(1, None), slice(None, -1))
+    merged = False
+    for index, g in enumerate(polys):
+        if p is not None:
+            iou = intersection(g, p) if merged else previous_ious[index - 1]
+            merged = iou > thres
+        if merged:
             p = weighted_merge(g, p)
         else:
             if p is not None:
@@ -12,33 +12,49 @@ class BaseRecLabelDecode:
         dict_character = self.add_special_char(dict_character)
         self.dict = {character: index for index, character in enumerate(dict_character)}
         self.character = dict_character
+        self.character_array = np.array(dict_character)
 
     def add_special_char(self, dict_character):
         return dict_character
 
-    def decode(self, text_index, text_prob=None, is_remove_duplicate=False):
-        """ convert text-index into text-label. """
-        result_list = []
+    def select_characters(self, characters):
+        """
+        Restrict the character table to the given characters for inference. The ignored tokens and the space added by
+        read_chars are always kept, and the order of the characters in the table is not changed.
+        :return: Indexes of the kept characters in the previous table, used to slice the output layer of the model.
+        """
+        characters = set(characters) | {" "}
+        unknown_chars = characters - set(self.character)
+        assert not unknown_chars, f"Characters are not in the alphabet! {unknown_chars}"
         ignored_tokens = self.get_ignored_tokens()
-        batch_size = len(text_index)
-        for batch_idx in range(batch_size):
-            char_list = []
-            conf_list = []
-            for idx in range(len(text_index[batch_idx])):
-                if text_index[batch_idx][idx] in ignored_tokens:
-                    continue
-                if is_remove_duplicate:
-                    # only for predict
-                    if idx > 0 and text_index[batch_idx][idx - 1] == text_index[batch_idx][idx]:
-                        continue
-                char_list.append(self.character[int(text_index[batch_idx][idx])])
-                if text_prob is not None:
-                    conf_list.append(text_prob[batch_idx][idx])
-                else:
-                    conf_list.append(1)
-            text = ''.join(char_list)
-            result_list.append((text, float(np.mean(conf_list)) if conf_list else 0))
-        return result_list
+        indexes = [index for index, character in enumerate(self.character)
+                   if index in ignored_tokens or character in characters]
+        self.character = [self.character[index] for index in indexes]
+        self.dict = {character: index for index, character in enumerate(self.character)}
+        self.character_array = np.array(self.character)
+        return indexes
+
+    def decode(self, text_index, text_prob=None, is_remove_duplicate=False):
+        """
+        convert text-index into text-label.
+        The characters of the whole [B, T] index matrix are selected with masks, the confidence of each sequence is
+        the mean probability of its selected characters. Only the join of the characters into texts is done per text.
+        """
+        text_index = np.asarray(text_index)
+        selection = ~np.isin(text_index, self.get_ignored_tokens())
+        if is_remove_duplicate:  # only for predict
+            selection[:, 1:] &= text_index[:, 1:] != text_index[:, :-1]
+        text_prob = np.ones(text_index.shape) if text_prob is None else np.asarray(text_prob)
+        lengths = selection.sum(1)
+        conf_sums = np.where(selection, text_prob, 0).sum(1, dtype=np.float64)
+        confs = np.divide(conf_sums, lengths, out=np.zeros(len(lengths)), where=lengths > 0)
+        return self.join_texts(text_index[selection], lengths, confs)
+
+    def join_texts(self, char_index, lengths, confs):
+        """ join the selected character indexes of all the sequences, in order, into texts of the given lengths. """
+        chars, ends = self.character_array[char_index].tolist(), np.cumsum(lengths).tolist()
+        texts = [''.join(chars[end - length:end]) for end, length in zip(ends, lengths.tolist())]
+        return list(zip(texts, confs.tolist()))
 
     def get_ignored_tokens(self):
         return [0]  # for ctc blank
@@ -51,11 +67,24 @@ class CTCLabelDecode(BaseRecLabelDecode):
         super().__init__(lang)
 
     def __call__(self, preds):
-        preds_prob, preds_idx = preds.max(2)
-        preds_prob, preds_idx = preds_prob.transpose(1, 0), preds_idx.transpose(1, 0)
-        preds_prob, preds_idx = torch.exp(preds_prob).detach().cpu().numpy(), preds_idx.detach().cpu().numpy()
-        text = self.decode(preds_idx, preds_prob, is_remove_duplicate=True)
-        return text
+        """
+        preds: [T, B, C] log probabilities or raw scores of the characters.
+        The blanks and repeated characters are removed on the device of the predictions, so only the indexes of the
+        selected characters and the confidence of each sequence are copied to the cpu.
+        """
+        preds = preds.detach()
+        preds_max, preds_idx = preds.max(2)
+        ignored_tokens = torch.tensor(self.get_ignored_tokens(), device=preds_idx.device)
+        selection = ~torch.isin(preds_idx, ignored_tokens)
+        selection[1:] &= preds_idx[1:] != preds_idx[:-1]
+        # softmax probability of the selected characters, it's the same for log probabilities and raw scores.
+        preds_prob = torch.zeros_like(preds_max)
+        preds_prob[selection] = (preds[selection] - preds_max[selection, None]).exp_().sum(1).reciprocal_()
+        preds_idx, selection = preds_idx.transpose(1, 0), selection.transpose(1, 0)
+        lengths = selection.sum(1)
+        confs = preds_prob.sum(0) / lengths.clamp(min=1)
+        char_index, lengths, confs = preds_idx[selection].cpu().numpy(), lengths.cpu().numpy(), confs.cpu().numpy()
+        return self.join_texts(char_index, lengths, confs)
 
     def add_special_char(self, dict_character):
         dict_character = ["blank"] + dict_character
@@ -1,14 +1,22 @@
+import hashlib
 import logging
 import os
+from copy import deepcopy
+from difflib import SequenceMatcher
+from itertools import batched, groupby
 from pathlib import Path
+from typing import Generator
 
 import cv2 as cv
 import numpy as np
 import torch
+from torch.ao.quantization import quantize_dynamic
 
-from sub_ocr.modeling import build_model
+from sub_ocr.modeling import (OnnxModel, build_model, convert_static_quantization, export_onnx, fuse_conv_bn,
+                              prepare_static_quantization, reparameterize)
+from sub_ocr.modeling.heads.rec_ctc_head import CTCHead
 from sub_ocr.postprocess import build_post_process
-from sub_ocr.utils import read_image, normalize_img, pascal_voc_bb
+from sub_ocr.utils import load_image, normalize_img, pascal_voc_bb
 
 logger = logging.getLogger(__name__)
 
@@ -31,7 +39,7 @@ class SubtitleOCR:
                                      'Backbone': {'name': 'MobileNetV3', 'scale': 0.5, 'model_name': 'large',
                                                   'disable_se': True},
                                      'Neck': {'name': 'RSEFPN', 'out_channels': 96, 'shortcut': True},
-                                     'Head': {'name': 'DBHead', 'k': 50}},
+                                     'Head': {'name': 'DBHead', 'k': 50, 'infer_thresh': False}},
                     "params": {"height": 960, "width": 960, "m32": True, "sort_merge": True},
                     "PostProcess": {'name': 'DBPostProcess', 'thresh': 0.3, 'box_thresh': 0.6, 'max_candidates': 1000,
                                     'unclip_ratio': 2.5}
@@ -42,7 +50,7 @@ class SubtitleOCR:
                     "Architecture": {'model_type': 'det', 'algorithm': 'DB', 'Transform': None,
                                      'Backbone': {'name': 'PPLCNetV3', 'scale': 0.75, 'det': True},
                                      'Neck': {'name': 'RSEFPN', 'out_channels': 96, 'shortcut': True},
-                                     'Head': {'name': 'DBHead', 'k': 50}},
+                                     'Head': {'name': 'DBHead', 'k': 50, 'infer_thresh': False}},
                     "params": {"height": 640, "width": 640, "m32": True, "sort_merge": True},
                     "PostProcess": {'name': 'DBPostProcess', 'thresh': 0.3, 'box_thresh': 0.6, 'max_candidates': 1000,
                                     'unclip_ratio': 2.5}
@@ -51,7 +59,7 @@ class SubtitleOCR:
                     "Architecture": {'model_type': 'det', 'algorithm': 'DB', 'Transform': None,
                                      'Backbone': {'name': 'PPLCNetV3', 'scale': 0.75, 'det': True},
                                      'Neck': {'name': 'RSEFPN', 'out_channels': 96, 'shortcut': True},
-                                     'Head': {'name': 'DBHead', 'k': 50}},
+                                     'Head': {'name': 'DBHead', 'k': 50, 'infer_thresh': False}},
                     "params": {"height": 640, "width": 960, "m32": True, "sort_merge": False},
                     "PostProcess": {'name': 'DBPostProcess', 'thresh': 0.3, 'box_thresh': 0.6, 'max_candidates': 1000,
                                     'unclip_ratio': 2.5}
@@ -66,8 +74,8 @@ class SubtitleOCR:
                                      'Neck': {'name': 'SequenceEncoder', 'encoder_type': 'svtr', 'dims': 120,
                                               'depth': 2,
                                               'hidden_dims': 120, 'kernel_size': [1, 3], 'use_guide': True},
-                                     'Head': {'name': 'CTCHead'}},
-                    "params": {"height": 48, "width": 320},
+                                     'Head': {'name': 'CTCHead', 'infer_log_softmax': False}},
+                    "params": {"height": 48, "width": 320, "width_buckets": [160, 320, 640, 960]},
                     "PostProcess": {'name': 'CTCLabelDecode'}
                 },
             },
@@ -78,24 +86,55 @@ class SubtitleOCR:
                                      'Neck': {'name': 'SequenceEncoder', 'encoder_type': 'svtr', 'dims': 120,
                                               'depth': 2,
                                               'hidden_dims': 120, 'kernel_size': [1, 3], 'use_guide': True},
-                                     'Head': {'name': 'CTCHead'}},
-                    "params": {"height": 48, "width": 320},
+                                     'Head': {'name': 'CTCHead', 'infer_log_softmax': False}},
+                    "params": {"height": 48, "width": 320, "width_buckets": [160, 320, 640, 960]},
                     "PostProcess": {'name': 'CTCLabelDecode'}
                 },
             },
         }
     }
 
-    def __init__(self, lang: str, model_dir: str = "saved models", device: str = "cuda") -> None:
+    # Axes of the exported onnx models that can change size. The rec prediction is [sequence, batch, characters].
+    onnx_dynamic_axes = {
+        "det": {"image": {0: "batch", 2: "height", 3: "width"}, "prediction": {0: "batch", 2: "height", 3: "width"}},
+        "rec": {"image": {0: "batch", 3: "width"}, "prediction": {0: "sequence", 1: "batch"}},
+    }
+
+    def __init__(self, lang: str, model_dir: str = "saved models", device: str = "cuda", optimize: bool = False,
+                 quantize: str = None, backend: str = "torch", compile_mode: str = None,
+                 allowed_chars: str = None, axis_aligned: bool = False) -> None:
         """
         Subtitle OCR package.
         :param lang: Language for text detection and recognition.
         :param model_dir: Directory for model files.
         :param device: Device to load model. GPU will only be used if it's requested and available.
+        :param optimize: Reparameterize and fuse the layers of the models for faster inference.
+        :param quantize: Quantize the models to int8 for faster cpu inference. Quantized models always use the cpu.
+            "dynamic" quantizes the weights of the linear and lstm layers.
+            "static" loads the models calibrated by quantize.py, their weights and activations are quantized.
+        :param backend: Inference backend. "onnxruntime" exports the models to onnx and runs them on the cpu with
+            onnxruntime. The exported models are saved in the model directory and reused.
+        :param compile_mode: Compile the torch models to reduce the python overhead of the many small layers.
+            "trace" traces and freezes the models with TorchScript. "compile" uses torch.compile, which compiles the
+            models on their first calls, call warmup before using the models to compile them ahead of time.
+        :param allowed_chars: Characters that the texts can contain. The output layer of the recognition model and the
+            character table of its decoder are sliced to these characters, which makes the model faster and smaller.
+        :param axis_aligned: The detected bboxes are the expanded bounding boxes of the text regions instead of rotated
+            rectangles. This is faster and works well for horizontal subtitles.
         """
         assert lang in self.supported_languages, "Requested language is not available!"
         assert device in ["cpu", "cuda"], "Requested device is not available!"
-        self.models_dir, self.device = Path(model_dir), device if torch.cuda.is_available() else "cpu"
+        assert quantize in [None, "dynamic", "static"], "Requested quantization is not available!"
+        assert backend in ["torch", "onnxruntime"], "Requested backend is not available!"
+        assert not (quantize and backend == "onnxruntime"), "Quantization is only available for the torch backend!"
+        assert compile_mode in [None, "trace", "compile"], "Requested compile mode is not available!"
+        assert not (compile_mode and backend == "onnxruntime"), "Compiling is only available for the torch backend!"
+        assert not (allowed_chars and quantize == "static"), "Static quantized models use the full alphabet!"
+        self.models_dir = Path(model_dir)
+        self.device = device if torch.cuda.is_available() and not quantize and backend == "torch" else "cpu"
+        self.optimize, self.quantize, self.backend, self.compile_mode = optimize, quantize, backend, compile_mode
+        self.allowed_chars = "".join(sorted(set(allowed_chars))) if allowed_chars else None
+        self.axis_aligned = axis_aligned
         self.det_model, self.det_post_process, self.det_params = self.init_model(lang, "det")
         self.rec_model, self.rec_post_process, self.rec_params = self.init_model(lang, "rec")
 
@@ -112,12 +151,131 @@ class SubtitleOCR:
             model_file = next(self.models_dir.glob(f"{config_name} *.pt"))  # best loss will be used
         config.update({"lang": lang})
         model, post_processor = build_model(config), build_post_process(config)
+        if model_type == "det":
+            post_processor.axis_aligned = self.axis_aligned
 
         logger.debug(f"Device: {self.device}, Model Config: {config},\nModel File: {model_file}")
         model.load_state_dict(torch.load(model_file, self.device, weights_only=True))
         model.to(self.device).eval()
+        if model_type == "rec" and self.allowed_chars:
+            self.select_characters(model, post_processor)
+        if self.optimize and self.quantize != "static":  # static quantization fuses the layers of the model
+            model = self.optimize_model(model, config["params"])
+        if self.quantize == "static":
+            model = self.load_static_quantized_model(model, config_name, config["params"])
+        elif self.quantize:
+            model = self.quantize_model(model)
+        if self.backend == "onnxruntime":
+            model = self.load_onnx_model(model, model_type, config_name, config, model_file)
+        if self.compile_mode:
+            model = self.compile_model(model, config["params"])
         return model, post_processor, config["params"]
 
+    def select_characters(self, model: torch.nn.Module, post_processor) -> None:
+        """
+        Slice the output layer of the ctc head and the character table of the decoder to the allowed characters.
+        """
+        class_indexes = post_processor.select_characters(self.allowed_chars)
+        for module in model.modules():
+            if isinstance(module, CTCHead):
+                module.select_classes(class_indexes)
+        logger.debug(f"Recognition characters selected. Number of classes: {len(class_indexes)}")
+
+    @torch.no_grad()
+    def optimize_model(self, model: torch.nn.Module, params: dict) -> torch.nn.Module:
+        """
+        Reparameterize the rep layers and fuse the conv and batch norm layers of a copy of the model.
+        The optimized model is only used if its outputs match the outputs of the original model.
+        """
+        inputs = torch.rand(1, 3, params["height"], params["width"], device=self.device)
+        optimized_model = deepcopy(model)
+        rep_layers, fused_pairs = reparameterize(optimized_model), fuse_conv_bn(optimized_model, inputs)
+        if not torch.allclose(model(inputs), optimized_model(inputs), rtol=1e-3, atol=1e-3):
+            logger.warning("Optimized model outputs do not match the original model. Original model will be used.")
+            return model
+        logger.debug(f"Model optimized. Reparameterized layers: {rep_layers}, Fused conv bn pairs: {fused_pairs}")
+        return optimized_model
+
+    def quantize_model(self, model: torch.nn.Module) -> torch.nn.Module:
+        """
+        Quantize the model to int8. Dynamic quantization converts the weights of the linear and lstm layers ahead of
+        time and the activations during inference. The accuracy against the fp32 model is checked in benchmark.py.
+        """
+        model = quantize_dynamic(model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8)
+        logger.debug(f"Model quantized. Quantization: {self.quantize}")
+        return model
+
+    def quantized_model_file(self, config_name: str) -> Path:
+        return self.models_dir / "Quantized" / f"{Path(config_name).stem}.pt"
+
+    @torch.no_grad()
+    def load_static_quantized_model(self, model: torch.nn.Module, config_name: str, params: dict) -> torch.nn.Module:
+        """
+        Rebuild the structure of the static quantized model and load the calibrated weights and activation ranges.
+        """
+        model_file = self.quantized_model_file(config_name)
+        assert model_file.exists(), "Static quantized model not found! Calibrate the model with quantize.py."
+        inputs = torch.rand(1, 3, params["height"], params["width"])
+        model = prepare_static_quantization(model, inputs)
+        model(inputs)  # the observers need an input before conversion, the calibrated values are loaded after
+        model = convert_static_quantization(model)
+        model.load_state_dict(torch.load(model_file, weights_only=True))
+        logger.debug(f"Model quantized. Quantization: {self.quantize}, Quantized Model File: {model_file}")
+        return model
+
+    def load_onnx_model(self, model: torch.nn.Module, model_type: str, config_name: str, config: dict,
+                        model_file: Path) -> OnnxModel:
+        """
+        Export the model to onnx if it has not been exported before and load it with onnxruntime.
+        The onnx file name has a hash of the model files, the architecture config and the reader options that change the
+        exported graph, so a retrained model or changed config is exported again instead of loading a stale onnx file.
+        """
+        source_files = [model_file]
+        if self.quantize == "static":
+            source_files.append(self.quantized_model_file(config_name))
+        cache_key = [(file.name, file.stat().st_mtime_ns, file.stat().st_size) for file in source_files]
+        cache_key += [config["Architecture"], self.optimize, self.quantize]
+        if model_type == "rec":  # the sliced models are saved separately for each character set
+            cache_key.append(self.allowed_chars)
+        model_hash = hashlib.md5(repr(cache_key).encode()).hexdigest()[:8]
+        onnx_file = self.models_dir / "ONNX" / f"{Path(config_name).stem} {model_hash}.onnx"
+        if not onnx_file.exists():
+            onnx_file.parent.mkdir(exist_ok=True)
+            inputs = torch.rand(1, 3, config["params"]["height"], config["params"]["width"])
+            export_onnx(model, inputs, onnx_file, self.onnx_dynamic_axes[model_type])
+            logger.debug(f"Model exported to onnx. Onnx Model File: {onnx_file}")
+        return OnnxModel(onnx_file)
+
+    @torch.no_grad()
+    def compile_model(self, model: torch.nn.Module, params: dict) -> torch.nn.Module:
+        """
+        Trace and freeze the model with TorchScript or compile it with torch.compile.
+        The traced model is not specialized to the input shape used for tracing, the models have no shape dependent
+        python control flow during inference.
+        """
+        if self.compile_mode == "trace":
+            inputs = torch.rand(1, 3, params["height"], params["width"], device=self.device)
+            model = torch.jit.freeze(torch.jit.trace(model, inputs))
+        else:
+            model = torch.compile(model)
+        logger.debug(f"Model compiled. Compile Mode: {self.compile_mode}")
+        return model
+
+    @torch.no_grad()
+    def warmup(self, image_shape: tuple = None, batch_size: int = 1) -> None:
+        """
+        Run the detection model with the input shape of the images and the recognition model with every width bucket,
+        so the first ocr request does not pay the compilation and memory allocation costs.
+        :param image_shape: Height and width of the images that will be used. The detection size is the default.
+        :param batch_size: Number of images in each batch.
+        """
+        height, width = image_shape or (self.det_params["height"], self.det_params["width"])
+        det_image = self.det_image_resize(np.zeros((height, width, 3), np.uint8))
+        self.det_model(torch.from_numpy(self.det_batch_pad([det_image] * batch_size)).to(self.device))
+        for bucket_width in self.rec_params["width_buckets"]:
+            self.rec_model(torch.zeros(batch_size, 3, self.rec_params["height"], bucket_width, device=self.device))
+        logger.debug(f"Models warmed up. Image Shape: {(height, width)}, Batch Size: {batch_size}")
+
     def det_image_resize(self, image: np.ndarray) -> np.ndarray:
         scale = min(self.det_params["height"] / image.shape[0], self.det_params["width"] / image.shape[1])
         resize_h, resize_w = image.shape[0] * scale, image.shape[1] * scale
@@ -138,14 +296,7 @@ class SubtitleOCR:
         return normalize_img(resized_image)
 
     @staticmethod
-    def merge_bboxes(bboxes: np.ndarray) -> tuple:
-        n_x1, n_y1 = np.min(bboxes[:, 0], axis=0)
-        n_x2, n_y2 = np.max(bboxes[:, 1], axis=0)
-        n_x3, n_y3 = np.max(bboxes[:, 2], axis=0)
-        n_x4, n_y4 = np.min(bboxes[:, 3], axis=0)
-        return (n_x1, n_y1), (n_x2, n_y2), (n_x3, n_y3), (n_x4, n_y4)
-
-    def sort_merge_bboxes(self, bboxes: np.ndarray, threshold: int = 10) -> list:
+    def sort_merge_bboxes(bboxes: np.ndarray, threshold: int = 10) -> list:
         """
         Sort and merge bboxes that are very close and on the same horizontal line to create larger bboxes.
         The y-coordinates is used because bounding boxes that are aligned horizontally will have similar y-coordinates.
@@ -158,50 +309,241 @@ class SubtitleOCR:
         sorted_bboxes, sorted_avg_y = bboxes[sorted_indices], avg_y[sorted_indices]
         # Find the differences between consecutive average y-coordinates
         diff_y = np.diff(sorted_avg_y, prepend=sorted_avg_y[0])
-        # Identify groups based on the threshold
-        group_labels = np.cumsum(diff_y > threshold)
-        # Use advanced indexing to group bounding boxes
-        groups = [sorted_bboxes[group_labels == i] for i in np.unique(group_labels)]
-        return [{"bbox": self.merge_bboxes(bbs)} for bbs in groups]
-
-    def text_detector(self, image: np.ndarray, image_height: int, image_width: int) -> list:
-        image = self.det_image_resize(image)
-        image = torch.from_numpy(image).to(self.device)
-        prediction = self.det_model(image.unsqueeze(0))
-        batch = {"shape": [(image_height, image_width)]}
-        bboxes, scores = self.det_post_process(batch, prediction)
-        bboxes = bboxes[0][scores[0] > 0]  # Remove bbox indexes with a score of zero.
+        # Identify groups based on the threshold, the bboxes of each group are next to each other after sorting
+        group_starts = np.flatnonzero(np.diff(np.cumsum(diff_y > threshold), prepend=-1))
+        # Merge the corners of the bboxes in each group
+        merged_bboxes = np.stack([np.minimum.reduceat(sorted_bboxes[:, 0], group_starts),
+                                  np.maximum.reduceat(sorted_bboxes[:, 1], group_starts),
+                                  np.maximum.reduceat(sorted_bboxes[:, 2], group_starts),
+                                  np.minimum.reduceat(sorted_bboxes[:, 3], group_starts)], axis=1)
+        return [{"bbox": tuple(map(tuple, bbox))} for bbox in merged_bboxes.tolist()]
+
+    def det_batch_pad(self, images: list) -> np.ndarray:
+        """
+        Pad the resized images at the bottom and right to the largest height and width among them and stack them into
+        a single [N, C, H, W] batch.
+        """
+        max_height, max_width = max(image.shape[1] for image in images), max(image.shape[2] for image in images)
+        batch = np.zeros((len(images), 3, max_height, max_width), np.float32)
+        for index, image in enumerate(images):
+            batch[index, :, :image.shape[1], :image.shape[2]] = image
+        return batch
+
+    def det_labels(self, bboxes: np.ndarray, scores: np.ndarray) -> list:
+        bboxes = bboxes[scores > 0]  # Remove bbox indexes with a score of zero.
         if self.det_params["sort_merge"]:
             labels = self.sort_merge_bboxes(bboxes) if bboxes.size else []
         else:
             labels = [{"bbox": bb.tolist()} for bb in bboxes]
         return labels
 
-    def recognizer(self, image: np.ndarray) -> tuple:
-        image = self.rec_image_resize(image)
-        image = torch.from_numpy(image).to(self.device)
-        prediction = self.rec_model(image.unsqueeze(0))
-        return self.rec_post_process(prediction)
-
-    def text_recognizer(self, image: np.ndarray, labels: list) -> list:
-        if labels:  # for labels with bbox
-            for label in labels:
-                x_min, y_min, x_max, y_max = pascal_voc_bb(label["bbox"])
-                cropped_image = image[y_min:y_max, x_min:x_max]  # crop image with bbox
-                if cropped_image.size:
-                    label["text"], label["score"] = self.recognizer(cropped_image)[0]
-                else:
-                    label["text"], label["score"] = "", 0  # for invalid crops
-        else:
-            labels = [{"text": text, "score": score} for text, score in self.recognizer(image)]
-        return labels
+    def text_detector(self, images: list) -> list:
+        """
+        Detect the texts in all the images with a single forward pass of the detection model.
+        The shape passed to the post processor is the original image shape scaled by the padding added to the image,
+        so the bboxes are mapped back to the original image coordinates.
+        """
+        resized_images = [self.det_image_resize(image) for image in images]
+        batch = self.det_batch_pad(resized_images)
+        prediction = self.det_model(torch.from_numpy(batch).to(self.device))
+        batch_height, batch_width = batch.shape[2:]
+        shapes = [(batch_height * image.shape[0] / resized_image.shape[1],
+                   batch_width * image.shape[1] / resized_image.shape[2])
+                  for image, resized_image in zip(images, resized_images)]
+        bboxes_batch, scores_batch = self.det_post_process({"shape": shapes}, prediction)
+        labels_batch = []
+        for image, bboxes, scores in zip(images, bboxes_batch, scores_batch):
+            bboxes[:, :, 0] = np.clip(bboxes[:, :, 0], 0, image.shape[1])
+            bboxes[:, :, 1] = np.clip(bboxes[:, :, 1], 0, image.shape[0])
+            labels_batch.append(self.det_labels(bboxes, scores))
+        return labels_batch
+
+    def rec_bucket_width(self, image_width: int) -> int | None:
+        """
+        Find the smallest width bucket that can hold the image width.
+        None is returned for images wider than the largest bucket, they will be padded to the widest of them.
+        """
+        for bucket_width in self.rec_params["width_buckets"]:
+            if image_width <= bucket_width:
+                return bucket_width
+
+    def rec_batch_pad(self, images: list, width: int) -> np.ndarray:
+        """
+        Pad the resized images on the right to the given width and stack them into a single [N, C, H, W] batch.
+        """
+        batch = np.zeros((len(images), 3, self.rec_params["height"], width), np.float32)
+        for index, image in enumerate(images):
+            batch[index, :, :, :image.shape[2]] = image
+        return batch
+
+    def recognizer(self, images: list) -> list:
+        """
+        Recognize the images with one forward pass per width bucket.
+        The images are sorted by aspect ratio and grouped into width buckets, so short texts are not padded to the
+        width of the longest text. The results are returned in the original order of the images.
+        """
+        images = [self.rec_image_resize(image) for image in images]
+        image_widths = [image.shape[2] for image in images]
+        bucket_widths = [self.rec_bucket_width(image_width) for image_width in image_widths]
+        sorted_indexes, results = sorted(range(len(images)), key=lambda i: image_widths[i]), [None] * len(images)
+        for bucket_width, indexes in groupby(sorted_indexes, key=lambda i: bucket_widths[i]):
+            indexes = list(indexes)
+            pad_width = bucket_width or max(image_widths[i] for i in indexes)
+            batch = self.rec_batch_pad([images[i] for i in indexes], pad_width)
+            prediction = self.rec_model(torch.from_numpy(batch).to(self.device))
+            for index, result in zip(indexes, self.rec_post_process(prediction)):
+                results[index] = result
+        return results
+
+    def text_recognizer(self, images: list, labels_batch: list) -> list:
+        """
+        Recognize the texts of all the images with one call of the recognizer.
+        The text in the bbox of each label will be recognized, and the whole image will be used if it has no labels.
+        """
+        cropped_images, valid_labels = [], []
+        for index, (image, labels) in enumerate(zip(images, labels_batch)):
+            if labels:  # for labels with bbox
+                for label in labels:
+                    x_min, y_min, x_max, y_max = pascal_voc_bb(label["bbox"])
+                    cropped_image = image[y_min:y_max, x_min:x_max]  # crop image with bbox
+                    if cropped_image.size:
+                        cropped_images.append(cropped_image)
+                        valid_labels.append(label)
+                    else:
+                        label["text"], label["score"] = "", 0  # for invalid crops
+            else:
+                labels_batch[index] = [{}]
+                cropped_images.append(image)
+                valid_labels.append(labels_batch[index][0])
+        if cropped_images:
+            for label, (text, score) in zip(valid_labels, self.recognizer(cropped_images)):
+                label["text"], label["score"] = text, score
+        return labels_batch
+
+    def ocr(self, image_path: str | bytes | np.ndarray, det: bool = True, rec: bool = True, bgr: bool = False) -> list:
+        """
+        Run ocr on a single image.
+        :param image_path: Image file location, encoded image bytes or image array.
+        :param det: Text detection will be used.
+        :param rec: Text recognition will be used.
+        :param bgr: The color format of the image array is bgr instead of rgb.
+        """
+        return self.ocr_batch([image_path], det, rec, bgr=bgr)[0]
 
     @torch.no_grad()
-    def ocr(self, image_path: str, det: bool = True, rec: bool = True) -> list:
-        image, image_height, image_width = read_image(image_path)
-        labels = self.text_detector(image, image_height, image_width) if det else []
-        labels = self.text_recognizer(image, labels) if rec else labels
-        return labels
+    def ocr_frames(self, images: list, det: bool = True, rec: bool = True) -> list:
+        """
+        Run ocr on a single batch of rgb images.
+        """
+        labels_batch = self.text_detector(images) if det else [[] for _ in images]
+        labels_batch = self.text_recognizer(images, labels_batch) if rec else labels_batch
+        return labels_batch
+
+    def ocr_batch(self, images: list, det: bool = True, rec: bool = True, batch_size: int = 8,
+                  bgr: bool = False) -> list:
+        """
+        Run ocr on multiple images. The images are processed in batches to use batched detection and recognition.
+        :param images: Image file locations, encoded image bytes or image arrays.
+        :param det: Text detection will be used.
+        :param rec: Text recognition will be used.
+        :param batch_size: Number of images in a single detection batch.
+        :param bgr: The color format of the image arrays is bgr instead of rgb.
+        :return: The labels of each image, in the same order as the images.
+        """
+        labels_batches = []
+        for images_batch in batched(images, batch_size):
+            images_batch = [load_image(image, bgr) for image in images_batch]
+            labels_batches.extend(self.ocr_frames(images_batch, det, rec))
+        return labels_batches
+
+    @staticmethod
+    def frame_changed(previous_frame: np.ndarray, frame: np.ndarray, threshold: float, pixel_diff: int = 25) -> bool:
+        """
+        Check if a grayscale frame has changed from the previous frame.
+        The frame has changed when the fraction of pixels with an intensity difference above the pixel diff is above
+        the threshold. Small differences from compression noise are ignored.
+        """
+        changed_pixels = np.count_nonzero(cv.absdiff(previous_frame, frame) > pixel_diff)
+        return changed_pixels / frame.size > threshold
+
+    def ocr_key_frames(self, key_frames: list, pending_frames: list, det: bool, rec: bool) -> Generator:
+        """
+        Run ocr on the key frames and yield the labels of the pending frames from the key frame they are matched to.
+        Each frame gets its own copy of the labels. The labels of the last key frame are returned.
+        """
+        labels_batch = self.ocr_frames(key_frames, det, rec)
+        for frame_no, timestamp, key_index in pending_frames:
+            yield frame_no, timestamp, deepcopy(labels_batch[key_index])
+        return labels_batch[-1]
+
+    def ocr_video(self, video_path: str, frame_step: int = 1, sub_area: tuple = None, change_threshold: float = 0.001,
+                  det: bool = True, rec: bool = True, batch_size: int = 8) -> Generator:
+        """
+        Run ocr on the frames of a video. Only frames where the subtitle area has changed from the last ocr frame are
+        sent to the models, the unchanged frames reuse the labels of the last ocr frame.
+        :param video_path: Video file location.
+        :param frame_step: Only every nth frame of the video will be used.
+        :param sub_area: Subtitle area of the frames (x_min, y_min, x_max, y_max). The whole frame is used if not given.
+            The bboxes of the labels will be relative to the subtitle area.
+        :param change_threshold: Fraction of changed pixels in the subtitle area for a frame to count as changed.
+        :param det: Text detection will be used.
+        :param rec: Text recognition will be used.
+        :param batch_size: Number of changed frames in a single detection batch.
+        :return: Frame number, frame timestamp in milliseconds and labels for each used frame. The timestamp is None
+            when the video has no frame rate, e.g. image sequences. Frames that fail to decode are skipped. The labels
+            of unchanged frames are copies, so changing the labels of one frame does not change the others.
+        """
+        capture = cv.VideoCapture(video_path)
+        assert capture.isOpened(), "Video file could not be opened!"
+        fps, frame_no = capture.get(cv.CAP_PROP_FPS), -1
+        key_frames, pending_frames, previous_gray, previous_labels = [], [], None, []
+        try:
+            while capture.grab():  # frames are only decoded when they are used
+                frame_no += 1
+                if frame_no % frame_step:
+                    continue
+                retrieved, frame = capture.retrieve()
+                if not retrieved:
+                    logger.warning(f"Frame {frame_no} could not be decoded and is skipped.")
+                    continue
+                if sub_area:
+                    x_min, y_min, x_max, y_max = sub_area
+                    frame = frame[y_min:y_max, x_min:x_max]
+                gray_frame, timestamp = cv.cvtColor(frame, cv.COLOR_BGR2GRAY), frame_no / fps * 1000 if fps else None
+                if previous_gray is None or self.frame_changed(previous_gray, gray_frame, change_threshold):
+                    key_frames.append(cv.cvtColor(frame, cv.COLOR_BGR2RGB))
+                    previous_gray = gray_frame
+                elif not key_frames:  # no frame is waiting for ocr, the previous labels are already known
+                    yield frame_no, timestamp, deepcopy(previous_labels)
+                    continue
+                pending_frames.append((frame_no, timestamp, len(key_frames) - 1))
+                if len(key_frames) == batch_size:
+                    previous_labels = yield from self.ocr_key_frames(key_frames, pending_frames, det, rec)
+                    key_frames, pending_frames = [], []
+            if key_frames:
+                yield from self.ocr_key_frames(key_frames, pending_frames, det, rec)
+        finally:
+            capture.release()
+
+
+def compare_ocr(reference: SubtitleOCR, candidate: SubtitleOCR, images: list, det: bool = True) -> dict:
+    """
+    Compare the texts of a candidate reader with the texts of a reference reader on a sample set of images.
+    Used to check the accuracy of quantized or exported models against the original fp32 models.
+    :param reference: Reader with the original models.
+    :param candidate: Reader with the optimized models.
+    :param images: Image file locations, encoded image bytes or image arrays.
+    :param det: Detect the text before recognition. False for images that are already text crops.
+    :return: Fraction of images with the exact same text and the mean text similarity ratio of the images.
+    """
+    reference_labels, candidate_labels = reference.ocr_batch(images, det), candidate.ocr_batch(images, det)
+    text_matches, text_similarities = [], []
+    for ref_labels, cand_labels in zip(reference_labels, candidate_labels):
+        ref_text = " ".join(label["text"] for label in ref_labels)
+        cand_text = " ".join(label["text"] for label in cand_labels)
+        text_matches.append(ref_text == cand_text)
+        text_similarities.append(SequenceMatcher(None, ref_text, cand_text).ratio())
+    return {"text_match": float(np.mean(text_matches)), "text_similarity": float(np.mean(text_similarities))}
 
 
 def test_ocr() -> None:
@@ -50,6 +50,32 @@ def read_image(image_path: str, rgb: bool = True) -> tuple:
     return image, image_height, image_width
 
 
+def load_image(image: str | Path | bytes | np.ndarray, bgr: bool = False) -> np.ndarray:
+    """
+    Load an image file location, encoded image bytes or image array as a rgb image array.
+    Image arrays that are already rgb, contiguous and uint8 are returned without a copy.
+    :param image: image file location, encoded image bytes or image array with shape [H, W, C] or [H, W]. C can be 1
+        (grayscale), 3 or 4.
+    :param bgr: The color format of the image array is bgr and will be changed to rgb. Not used for files and bytes.
+    :return: rgb image array
+    """
+    if isinstance(image, (str, Path)):
+        return read_image(str(image))[0]
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        image = cv.imdecode(np.frombuffer(image, np.uint8), cv.IMREAD_COLOR)
+        assert image is not None, "Image bytes could not be decoded!"
+        return cv.cvtColor(image, cv.COLOR_BGR2RGB)
+    assert image.dtype == np.uint8, "Image array must be uint8!"
+    assert image.ndim == 2 or (image.ndim == 3 and image.shape[2] in (1, 3, 4)), \
+        f"Image array must have shape [H, W] or [H, W, C] with 1, 3 or 4 channels, not {image.shape}!"
+    image = np.ascontiguousarray(image)
+    if image.ndim == 2 or image.shape[2] == 1:
+        return cv.cvtColor(image, cv.COLOR_GRAY2RGB)
+    if image.shape[2] == 4:
+        return cv.cvtColor(image, cv.COLOR_BGRA2RGB if bgr else cv.COLOR_RGBA2RGB)
+    return cv.cvtColor(image, cv.COLOR_BGR2RGB) if bgr else image
+
+
 def rescale(scale: float, frame: np.ndarray = None, bbox: tuple | list = None) -> np.ndarray | tuple:
     """
     Method to rescale any image frame or bbox using scale.
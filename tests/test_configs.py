@@ -7,6 +7,7 @@ import yaml
 
 from sub_ocr.losses import build_loss
 from sub_ocr.metrics import build_metric
+from sub_ocr.modeling import fuse_conv_bn, reparameterize
 from sub_ocr.modeling.architectures import build_model
 from train import build_optimizer, build_datasets
 
@@ -76,6 +77,27 @@ class TestBuildModel(TestCase):
                 print(f"Config: {config_file}, passed {test_name} test.")
 
 
+class TestFuseModel(TestCase):
+
+    def test_fuse_model(self) -> None:
+        test_name = "fuse model"
+        print(f"\nTesting {test_name} with configs...")
+        for i, config_file in enumerate(all_configs):
+            with self.subTest(f"File: {config_file}", i=i):
+                config = yaml.safe_load(config_file.read_text(encoding="utf-8"))
+                model = build_model(config | {"lang": "en"}).eval()
+                for module in model.modules():  # running statistics are changed so the folding is not a no-op
+                    if isinstance(module, torch.nn.BatchNorm2d):
+                        module.running_mean.uniform_(-0.1, 0.1), module.running_var.uniform_(0.8, 1.2)
+                images = torch.rand([2, 3, config["Dataset"]["image_height"], config["Dataset"]["image_width"]])
+                with torch.no_grad():
+                    expected = model(images)
+                    reparameterize(model)
+                    self.assertGreater(fuse_conv_bn(model, images), 0)
+                    self.assertTrue(torch.allclose(model(images), expected, rtol=1e-3, atol=1e-3))
+                print(f"Config: {config_file}, passed {test_name} test.")
+
+
 class TestBuildLoss(TestCase):
 
     def test_build_loss(self) -> None:
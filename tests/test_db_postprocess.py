@@ -0,0 +1,89 @@
+from unittest import TestCase
+
+import cv2 as cv
+import numpy as np
+import torch
+
+from sub_ocr.postprocess.db_postprocess import DBPostProcess
+
+
+class TestDBPostProcess(TestCase):
+
+    def test_rect_un_clip(self) -> None:
+        print("\nTesting closed form rectangle un clip against pyclipper...")
+        rng, un_clip_ratio = np.random.default_rng(31), 2.5
+        for i in range(200):
+            rect = (float(rng.uniform(50, 900)), float(rng.uniform(50, 500))), \
+                (float(rng.uniform(3, 300)), float(rng.uniform(3, 40))), float(rng.uniform(-90, 90))
+            with self.subTest(f"Rect: {rect}", i=i):
+                box, _ = DBPostProcess.get_mini_boxes(cv.boxPoints(rect))
+                expanded = DBPostProcess.un_clip(np.array(box), un_clip_ratio).reshape(-1, 1, 2)
+                clipper_box = np.array(DBPostProcess.get_mini_boxes(expanded)[0])
+
+                (center_x, center_y), (width, height), angle = cv.minAreaRect(cv.boxPoints(rect))
+                rects = np.array([[center_x, center_y, width, height, angle]], np.float32)
+                rects = DBPostProcess.un_clip_rects(rects, un_clip_ratio)
+                numpy_box = DBPostProcess.order_points(DBPostProcess.rect_points(rects))[0]
+                # pyclipper rounds to integer coordinates, corners with an equal x can be ordered differently
+                error = min(np.abs(np.roll(numpy_box, shift, 0) - clipper_box).max() for shift in range(4))
+                self.assertLess(error, 3)
+        print("Closed form rectangle un clip passed test...")
+
+    def test_boxes_from_bitmap(self) -> None:
+        print("\nTesting boxes from bitmap...")
+        post_process = DBPostProcess(thresh=0.3, box_thresh=0.6, unclip_ratio=1.5)
+        prediction = np.zeros((1, 1, 96, 192), np.float32)
+        prediction[0, 0, 20:40, 30:130] = 0.9
+        prediction[0, 0, 60:62, 10:12] = 0.9  # too small
+        prediction[0, 0, 60:80, 150:180] = 0.4  # low score
+        boxes, scores = post_process({"shape": [(192, 384)]}, torch.from_numpy(prediction))
+        self.assertEqual(len(boxes[0]), 1)
+        self.assertAlmostEqual(scores[0][0], 0.9, places=5)
+        x_min, y_min = boxes[0][0].min(0)
+        x_max, y_max = boxes[0][0].max(0)
+        self.assertTrue(x_min < 60 < 258 < x_max and y_min < 40 < 78 < y_max)
+        print("Boxes from bitmap passed test...")
+
+    def test_axis_aligned_boxes(self) -> None:
+        print("\nTesting axis aligned boxes from bitmap...")
+        prediction = np.zeros((1, 1, 96, 192), np.float32)
+        prediction[0, 0, 20:40, 30:130] = 0.9
+        prediction[0, 0, 60:75, 20:60] = 0.8
+        prediction = torch.from_numpy(prediction)
+        rotated_boxes, _ = DBPostProcess(box_thresh=0.6)({"shape": [(96, 192)]}, prediction)
+        boxes, _ = DBPostProcess(box_thresh=0.6, axis_aligned=True)({"shape": [(96, 192)]}, prediction)
+        np.testing.assert_array_equal(boxes[0], rotated_boxes[0])
+        self.assertEqual(boxes[0][:, 0, 1].tolist(), boxes[0][:, 1, 1].tolist())  # horizontal top edges
+        print("Axis aligned boxes passed test...")
+
+    def test_downsampled_boxes(self) -> None:
+        print("\nTesting boxes from a downsampled bitmap...")
+        prediction = np.zeros((1, 1, 96, 192), np.float32)
+        prediction[0, 0, 20:40, 30:130] = 0.9
+        prediction[0, 0, 60:76, 20:60] = 0.8
+        prediction = torch.from_numpy(prediction)
+        boxes, _ = DBPostProcess(box_thresh=0.6)({"shape": [(96, 192)]}, prediction)
+        for downsample in (2, 4):
+            with self.subTest(downsample=downsample):
+                post_process = DBPostProcess(box_thresh=0.6, downsample=downsample)
+                downsampled_boxes, _ = post_process({"shape": [(96, 192)]}, prediction)
+                self.assertEqual(downsampled_boxes[0].shape, boxes[0].shape)
+                self.assertLessEqual(np.abs(downsampled_boxes[0].astype(int) - boxes[0]).max(), downsample)
+        print("Downsampled boxes passed test...")
+
+    def test_threaded_batch(self) -> None:
+        print("\nTesting threaded post process of a batch...")
+        rng = np.random.default_rng(31)
+        prediction = np.zeros((6, 1, 96, 192), np.float32)
+        for image in prediction:
+            for _ in range(4):
+                y, x = rng.integers(0, 80), rng.integers(0, 150)
+                image[0, y:y + rng.integers(6, 16), x:x + rng.integers(10, 40)] = rng.uniform(0.7, 1)
+        prediction, batch = torch.from_numpy(prediction), {"shape": [(96, 192)] * 6}
+        boxes, scores = DBPostProcess(box_thresh=0.6)(batch, prediction)
+        threaded_boxes, threaded_scores = DBPostProcess(box_thresh=0.6, num_threads=3)(batch, prediction)
+        for image_boxes, image_scores, threaded_image_boxes, threaded_image_scores in zip(boxes, scores, threaded_boxes,
+                                                                                          threaded_scores):
+            np.testing.assert_array_equal(image_boxes, threaded_image_boxes)
+            np.testing.assert_array_equal(image_scores, threaded_image_scores)
+        print("Threaded post process passed test...")
@@ -0,0 +1,26 @@
+from unittest import TestCase
+
+import torch
+
+from sub_ocr.metrics.det_db_metric import RunningScore, cal_text_score
+
+
+class TestRunningScore(TestCase):
+    def test_cal_text_score(self) -> None:
+        print("\nTesting text score of the shrink maps...")
+        texts = torch.tensor([[[0.9, 0.2, 0.8, 0.1], [0.7, 0.3, 0.6, 0.9]]])
+        gt_texts = torch.tensor([[[1, 0, 0, 1], [1, 1, 0, 0]]], dtype=torch.float32)
+        training_masks = torch.tensor([[[1, 1, 1, 1], [1, 1, 0, 0]]], dtype=torch.float32)  # masked pixels are true neg
+        running_score = RunningScore(2)
+        scores = cal_text_score(texts, gt_texts, training_masks, running_score)
+        # rows are the gt classes and columns are the predicted classes
+        torch.testing.assert_close(running_score.confusion_matrix, torch.tensor([[3, 1], [2, 2]]))
+        self.assertAlmostEqual(scores["Overall Acc"].item(), 5 / 8, places=4)
+        self.assertAlmostEqual(scores["Mean Acc"].item(), (3 / 4 + 2 / 4) / 2, places=4)
+        self.assertAlmostEqual(scores["Mean IoU"].item(), (3 / 6 + 2 / 5) / 2, places=4)
+
+        cal_text_score(texts, gt_texts, training_masks, running_score)  # the batches are accumulated
+        torch.testing.assert_close(running_score.confusion_matrix, torch.tensor([[6, 2], [4, 4]]))
+        running_score.reset()
+        torch.testing.assert_close(running_score.confusion_matrix, torch.zeros(2, 2, dtype=torch.int64))
+        print("Text score of the shrink maps passed test...")
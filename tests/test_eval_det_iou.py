@@ -0,0 +1,21 @@
+from unittest import TestCase
+
+from sub_ocr.metrics.eval_det_iou import DetectionIoUEvaluator
+
+
+class TestDetectionIoUEvaluator(TestCase):
+    def test_evaluate_image(self) -> None:
+        print("\nTesting detection evaluation of an image...")
+        evaluator = DetectionIoUEvaluator()
+        gt = [{"bbox": [(0, 0), (100, 0), (100, 20), (0, 20)]},
+              {"bbox": [(200, 0), (300, 0), (300, 20), (200, 20)]},
+              {"bbox": [(0, 0), (10, 10), (10, 0), (0, 10)]}]  # invalid polygon
+        pred = [{"bbox": [(2, 0), (102, 0), (102, 20), (2, 20)]},
+                {"bbox": [(0, 1), (100, 1), (100, 21), (0, 21)]},  # gt is already matched
+                {"bbox": [(200, 0), (240, 0), (240, 20), (200, 20)]},  # IoU is too low
+                {"bbox": [(500, 500), (600, 500), (600, 520), (500, 520)]}]
+        self.assertEqual(evaluator.evaluate_image(gt, pred), {"gtCare": 2, "detCare": 4, "detMatched": 1})
+        self.assertEqual(evaluator.evaluate_image([], pred), {"gtCare": 0, "detCare": 4, "detMatched": 0})
+        results = evaluator.combine_results([evaluator.evaluate_image(gt, pred), evaluator.evaluate_image(gt, gt)])
+        self.assertEqual(results, {"precision": 0.5, "recall": 0.75, "hmean": 0.6})
+        print("Detection evaluation passed test...")
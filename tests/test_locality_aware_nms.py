@@ -0,0 +1,29 @@
+from unittest import TestCase
+
+import numpy as np
+
+from sub_ocr.postprocess import locality_aware_nms as nms
+
+
+class TestLocalityAwareNMS(TestCase):
+    quads = np.array([[0, 0, 100, 0, 100, 20, 0, 20, 0.9],
+                      [2, 0, 102, 0, 102, 20, 2, 20, 0.8],  # overlaps the first quad
+                      [200, 0, 300, 0, 300, 20, 200, 20, 0.7],
+                      [0, 0, 100, 20, 0, 20, 100, 0, 0.6]], np.float64)  # self intersecting quad
+
+    def test_intersection(self) -> None:
+        print("\nTesting quad intersection over union...")
+        self.assertAlmostEqual(nms.intersection(self.quads[0], self.quads[1]), 98 / 102)
+        self.assertEqual(nms.intersection(self.quads[0], self.quads[2]), 0)
+        print("Quad intersection over union passed test...")
+
+    def test_nms(self) -> None:
+        print("\nTesting nms of quads...")
+        self.assertEqual(nms.nms(self.quads, 0.3), [0, 2, 3])
+        np.testing.assert_array_equal(nms.standard_nms(self.quads, 0.3), self.quads[[0, 2, 3]])
+        soft_boxes = nms.soft_nms(self.quads, threshold=0.5)
+        np.testing.assert_array_equal(soft_boxes[:, :8], self.quads[[0, 2, 3], :8])
+        merged_boxes = nms.nms_locality(self.quads.copy(), 0.3)
+        self.assertEqual(len(merged_boxes), 3)
+        self.assertAlmostEqual(merged_boxes[0, 8], 1.7)
+        print("Nms of quads passed test...")
@@ -0,0 +1,29 @@
+from pathlib import Path
+from unittest import TestCase
+
+import torch
+import yaml
+
+from sub_ocr.modeling.architectures import build_model
+from sub_ocr.postprocess.rec_postprocess import CTCLabelDecode
+from sub_ocr.subtitle_ocr import SubtitleOCR
+
+
+class TestDynamicQuantization(TestCase):
+    def test_rec_dynamic_quantization(self) -> None:
+        print("\nTesting recognition decoding of the dynamic quantized model...")
+        config = yaml.safe_load(Path("../configs/rec/rec_mv3_none_bilstm_ctc.yml").read_text(encoding="utf-8"))
+        torch.manual_seed(31)
+        model, decoder = build_model(config | {"lang": "en"}).eval(), CTCLabelDecode("en")
+        reader = SubtitleOCR.__new__(SubtitleOCR)
+        reader.quantize = "dynamic"
+        quantized_model = reader.quantize_model(model)
+        self.assertIsNot(quantized_model, model)  # the fp32 model is not changed in place
+        inputs = torch.rand(4, 3, config["Dataset"]["image_height"], config["Dataset"]["image_width"])
+        with torch.no_grad():
+            results, quantized_results = decoder(model(inputs)), decoder(quantized_model(inputs))
+
+        self.assertEqual([text for text, _ in results], [text for text, _ in quantized_results])
+        for (_, confidence), (_, quantized_confidence) in zip(results, quantized_results):
+            self.assertAlmostEqual(confidence, quantized_confidence, delta=0.01)
+        print("Recognition decoding of the dynamic quantized model passed test...")
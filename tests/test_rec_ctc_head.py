@@ -0,0 +1,27 @@
+import copy
+from unittest import TestCase
+
+import torch
+
+from sub_ocr.modeling.heads.rec_ctc_head import CTCHead
+
+
+class TestCTCHead(TestCase):
+    def test_select_classes(self) -> None:
+        print("\nTesting class selection of the ctc head...")
+        torch.manual_seed(31)
+        inputs, class_indexes = torch.randn(2, 25, 64), [0, 5, 7, 42, 99]  # [B, T, C]
+        for i, mid_channels in enumerate([None, 32]):
+            with self.subTest(f"mid_channels: {mid_channels}", i=i):
+                head = CTCHead(64, 100, mid_channels, infer_log_softmax=False).eval()
+                sliced_head = copy.deepcopy(head)
+                sliced_head.select_classes(class_indexes)
+                with torch.no_grad():
+                    outputs, sliced_outputs = head(inputs), sliced_head(inputs)
+                self.assertEqual(sliced_head.out_channels, len(class_indexes))
+                self.assertEqual(sliced_outputs.shape, (25, 2, len(class_indexes)))  # [T, B, C]
+                torch.testing.assert_close(sliced_outputs, outputs[:, :, class_indexes])
+                sliced_head.infer_log_softmax = True  # normalized over the selected classes only
+                with torch.no_grad():
+                    torch.testing.assert_close(sliced_head(inputs), outputs[:, :, class_indexes].log_softmax(2))
+        print("Class selection of the ctc head passed test...")
@@ -1,6 +1,8 @@
 import copy
 from unittest import TestCase
 
+import torch
+
 from data.preprocess import rec_label_ops as enc
 from sub_ocr.postprocess import rec_postprocess as dec
 
@@ -20,3 +22,45 @@ class TestRecDataEncodeDecode(TestCase):
                 decoded_text = decoded_text[0][0].replace("<s>", "")
                 self.assertEqual(test_text["text"], decoded_text)
                 print(f"{name} passed test...")
+
+    def test_ctc_greedy_decoding(self) -> None:
+        print("\nTesting ctc greedy decoding of predictions...")
+        decoder = dec.CTCLabelDecode("en")
+        a, b = decoder.dict["a"], decoder.dict["b"]
+        text_index = [[a, a, 0, a, b, b, 0], [0, 0, 0, 0, 0, 0, 0]]
+        text_prob = [[0.9, 0.9, 0.5, 0.6, 0.3, 0.3, 0.5], [0.5] * 7]
+        (text, conf), (empty_text, empty_conf) = decoder.decode(text_index, text_prob, is_remove_duplicate=True)
+        self.assertEqual((text, empty_text), ("aab", ""))
+        self.assertAlmostEqual(conf, (0.9 + 0.6 + 0.3) / 3)
+        self.assertEqual(empty_conf, 0)
+        print("CTC greedy decoding passed test...")
+
+    def test_ctc_log_softmax_decoding(self) -> None:
+        print("\nTesting ctc decoding of raw scores and log probabilities...")
+        decoder, generator = dec.CTCLabelDecode("en"), torch.Generator().manual_seed(31)
+        logits = torch.randn(25, 3, len(decoder.character), generator=generator) * 3  # [T, B, C]
+        logits[:, 1, 0] += 100  # the second sequence only has blanks
+        results, log_softmax_results = decoder(logits), decoder(logits.log_softmax(2))
+        self.assertEqual([text for text, _ in results], [text for text, _ in log_softmax_results])
+        for (_, conf), (_, log_softmax_conf) in zip(results, log_softmax_results):
+            self.assertAlmostEqual(conf, log_softmax_conf, places=5)
+
+        probs = logits.softmax(2).transpose(1, 0)  # the python decoder on softmax probabilities is the reference
+        text_prob, text_index = probs.max(2)
+        expected = decoder.decode(text_index.tolist(), text_prob.tolist(), is_remove_duplicate=True)
+        self.assertEqual(results[1], ("", 0))
+        self.assertTrue(results[0][0] and results[2][0])
+        for (text, conf), (expected_text, expected_conf) in zip(results, expected):
+            self.assertEqual(text, expected_text)
+            self.assertAlmostEqual(conf, expected_conf, places=5)
+        print("CTC decoding of raw scores and log probabilities passed test...")
+
+    def test_select_characters(self) -> None:
+        print("\nTesting character selection of the decoder...")
+        decoder, full_character = dec.CTCLabelDecode("en"), dec.CTCLabelDecode("en").character
+        indexes = decoder.select_characters("cab")
+        expected_character = ["blank"] + [character for character in full_character if character in "abc "]
+        self.assertEqual(decoder.character, expected_character)
+        self.assertEqual([full_character[index] for index in indexes], decoder.character)
+        self.assertEqual(decoder.decode([[decoder.dict["b"], 0, decoder.dict[" "], decoder.dict["a"]]])[0][0], "b a")
+        print("Character selection passed test...")
@@ -0,0 +1,94 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import cv2 as cv
+import numpy as np
+import torch
+
+from sub_ocr.postprocess.db_postprocess import DBPostProcess
+from sub_ocr.subtitle_ocr import SubtitleOCR
+
+
+def stub_reader() -> SubtitleOCR:
+    """
+    Reader without model files, the models and post processors are set by each test.
+    """
+    reader = SubtitleOCR.__new__(SubtitleOCR)
+    reader.device = "cpu"
+    reader.rec_params = {"height": 48, "width": 320, "width_buckets": [160, 320, 640, 960]}
+    reader.det_params = {"height": 640, "width": 640, "m32": True, "sort_merge": False}
+    return reader
+
+
+class TestTextDetector(TestCase):
+    def test_text_detector_coordinates(self) -> None:
+        print("\nTesting text detector bbox coordinates of a padded batch...")
+        reader = stub_reader()
+        # the stub model predicts the bright pixels of the normalized images as text
+        reader.det_model = lambda batch: (batch.mean(1, keepdim=True) > 0.5).float()
+        reader.det_post_process = DBPostProcess(box_thresh=0.6, unclip_ratio=1.5)
+        wide_image, tall_image = np.zeros((480, 960, 3), np.uint8), np.zeros((900, 300, 3), np.uint8)
+        wide_image[200:260, 100:400], tall_image[600:660, 50:250] = 255, 255
+        text_rects = [(100, 200, 400, 260), (50, 600, 250, 660)]  # x_min, y_min, x_max, y_max
+
+        labels_batch = reader.text_detector([wide_image, tall_image])
+        for image, labels, (x_min, y_min, x_max, y_max) in zip([wide_image, tall_image], labels_batch, text_rects):
+            self.assertEqual(len(labels), 1)
+            bbox = np.array(labels[0]["bbox"])
+            (box_x_min, box_y_min), (box_x_max, box_y_max) = bbox.min(0), bbox.max(0)
+            # the un clipped box contains the text and has the same center in the image coordinates
+            self.assertTrue(box_x_min <= x_min and box_y_min <= y_min and x_max <= box_x_max and y_max <= box_y_max)
+            self.assertLess(abs((box_x_min + box_x_max) - (x_min + x_max)) / 2, 5)
+            self.assertLess(abs((box_y_min + box_y_max) - (y_min + y_max)) / 2, 5)
+            self.assertTrue(0 <= box_x_min and box_x_max <= image.shape[1] and 0 <= box_y_min and
+                            box_y_max <= image.shape[0])
+        print("Text detector bbox coordinates passed test...")
+
+
+class TestRecognizer(TestCase):
+    def test_recognizer_order(self) -> None:
+        print("\nTesting recognizer width buckets and result order...")
+        reader, rng = stub_reader(), np.random.default_rng(31)
+        # the stub model returns the content width and the padded width of each image in the batch
+        reader.rec_model = lambda batch: torch.stack([(batch.abs().sum((1, 2)) > 0).sum(1),
+                                                      torch.full((batch.size(0),), batch.size(3))], 1)
+        reader.rec_post_process = lambda prediction: [(str(width), pad_width) for width, pad_width in
+                                                      prediction.tolist()]
+        image_widths = [500, 100, 1200, 300, 150, 1000, 700, 160]
+        images = [rng.integers(1, 256, (48, width, 3), np.uint8) for width in image_widths]
+        expected_pad_widths = [640, 160, 1200, 320, 160, 1200, 960, 160]  # wider than 960 are padded to the widest
+        results = reader.recognizer(images)
+        self.assertEqual(results, [(str(width), pad_width) for width, pad_width in
+                                   zip(image_widths, expected_pad_widths)])
+        print("Recognizer width buckets and result order passed test...")
+
+
+class TestOCRVideo(TestCase):
+    def test_unchanged_frame_skipping(self) -> None:
+        print("\nTesting unchanged frame skipping of video ocr...")
+        frame_values = [50, 50, 50, 200, 200, 50, 50]  # 3 key frames
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = str(Path(temp_dir) / "test video.avi")
+            writer = cv.VideoWriter(video_path, cv.VideoWriter.fourcc(*"MJPG"), 10, (64, 48))
+            for value in frame_values:
+                writer.write(np.full((48, 64, 3), value, np.uint8))
+            writer.release()
+
+            reader, key_frames = stub_reader(), []
+
+            def ocr_frames(images, _det, _rec):
+                key_frames.extend(images)
+                return [[{"text": str(round(image.mean()))}] for image in images]
+
+            reader.ocr_frames = ocr_frames
+            results = list(reader.ocr_video(video_path, batch_size=2))
+
+        self.assertEqual(len(key_frames), 3)
+        self.assertEqual([frame_no for frame_no, _, _ in results], list(range(len(frame_values))))
+        self.assertEqual([timestamp for _, timestamp, _ in results], [frame_no * 100 for frame_no in range(7)])
+        texts = [int(labels[0]["text"]) for _, _, labels in results]
+        self.assertTrue(all(abs(text - value) <= 3 for text, value in zip(texts, frame_values)))
+        results[0][2][0]["text"] = "changed"  # the labels of each frame are independent
+        self.assertNotEqual(results[1][2][0]["text"], "changed")
+        print("Unchanged frame skipping passed test...")
@@ -0,0 +1,38 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import cv2 as cv
+import numpy as np
+
+from sub_ocr.utils import load_image
+
+
+class TestLoadImage(TestCase):
+    rgb_image = np.random.default_rng(31).integers(0, 256, (24, 32, 3), np.uint8)
+
+    def test_load_image_files_and_bytes(self) -> None:
+        print("\nTesting image loading from files and bytes...")
+        bgr_image = cv.cvtColor(self.rgb_image, cv.COLOR_RGB2BGR)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            image_path = Path(temp_dir) / "test image.png"
+            cv.imwrite(str(image_path), bgr_image)
+            np.testing.assert_array_equal(load_image(image_path), self.rgb_image)
+            np.testing.assert_array_equal(load_image(str(image_path)), self.rgb_image)
+        np.testing.assert_array_equal(load_image(cv.imencode(".png", bgr_image)[1].tobytes()), self.rgb_image)
+        print("Image loading from files and bytes passed test...")
+
+    def test_load_image_arrays(self) -> None:
+        print("\nTesting image loading from arrays...")
+        gray_image = self.rgb_image[:, :, 0]
+        expected_gray = np.repeat(gray_image[:, :, None], 3, 2)
+        np.testing.assert_array_equal(load_image(gray_image), expected_gray)
+        np.testing.assert_array_equal(load_image(gray_image[:, :, None]), expected_gray)
+        rgba_image = np.dstack([self.rgb_image, np.full(self.rgb_image.shape[:2], 255, np.uint8)])
+        np.testing.assert_array_equal(load_image(rgba_image), self.rgb_image)
+        np.testing.assert_array_equal(load_image(rgba_image[:, :, [2, 1, 0, 3]], bgr=True), self.rgb_image)
+        np.testing.assert_array_equal(load_image(self.rgb_image[:, :, ::-1], bgr=True), self.rgb_image)
+        self.assertIs(load_image(self.rgb_image), self.rgb_image)  # no copy of contiguous rgb uint8 arrays
+        with self.assertRaises(AssertionError):
+            load_image(self.rgb_image[:, :, :2])
+        print("Image loading from arrays passed test...")
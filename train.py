@@ -52,7 +52,8 @@ def train_model(model_dir: str, config_name: str, config: dict) -> None:
 
     lr_scheduler = ReduceLROnPlateau(optimizer, patience=params["patience"])
     train_params = {"loss_fn": loss_fn, "metrics_fn": metric_fn, "optimizer": optimizer, "lr_scheduler": lr_scheduler,
-                    "num_epochs": params["num_epochs"], "model_dir": model_dir, "model_filename": config_name}
+                    "num_epochs": params["num_epochs"], "model_dir": model_dir, "model_filename": config_name,
+                    "log_interval": params.get("log_interval", 10)}
     trainer = ModelTrainer(model, train_params)
     trainer.set_loaders(train_ds, val_ds, params["batch_size"], params["val_batch_size"], params["num_workers"])
     trainer.load_checkpoint("")
@@ -20,12 +20,15 @@ class ModelTrainer:
         The batches from the dataloader should be a dictionary.
         The losses from the loss function should be a dictionary.
         The trainer requires the use of a metrics function that should return a dictionary.
+        The batch losses and metrics can be tensors on the device, they are only copied to the host every log_interval
+        batches and at the end of the epoch.
         """
         self.use_cuda = torch.cuda.is_available()
         self.device = "cuda" if self.use_cuda else "cpu"
         self.model = self.init_model(model)
         self.loss_fn, self.metrics_fn, self.optimizer = params["loss_fn"], params["metrics_fn"], params["optimizer"]
         self.lr_scheduler, self.num_epochs = params["lr_scheduler"], params["num_epochs"]
+        self.log_interval = params.get("log_interval", 10)
         self.model_dir, self.model_filename = Path(params["model_dir"]), Path(params["model_filename"])
         self.checkpoint_dir = self.model_dir / "Checkpoints"
         self.model_dir.mkdir(parents=True, exist_ok=True), self.checkpoint_dir.mkdir(exist_ok=True)
@@ -116,6 +119,27 @@ class ModelTrainer:
             dict_1[key] = round(value, 5)
             dict_2.setdefault(key, []).append(value)
 
+    @staticmethod
+    def append_batch_val(dict_1: dict, dict_2: dict) -> None:
+        """
+        Append the batch values without copying the tensors to the host.
+        :param dict_1: The dictionary's value that will be used to append dict_2
+        :param dict_2: The dictionary's value that will be appended. Should have a list value or no value.
+        """
+        for key, value in dict_1.items():
+            if isinstance(value, torch.Tensor):
+                value = value.detach()
+            dict_2.setdefault(key, []).append(value)
+
+    @staticmethod
+    def mean_val(values: list) -> float:
+        """
+        Mean of the batch values, the tensors are averaged on the device and copied to the host once.
+        """
+        if isinstance(values[0], torch.Tensor):
+            return torch.stack(values).mean().item()
+        return float(np.mean(values))
+
     def _mini_batch(self, validation: bool = False) -> tuple[dict, dict]:
         """
         The mini-batch can be used with both loaders.
@@ -131,13 +155,17 @@ class ModelTrainer:
             self.dict_to_device(batch)
             images = batch.pop("image")
             batch_loss, batch_metric = step_fn(images, batch)
-            self.append_dict_val(batch_loss, batch_losses), self.append_dict_val(batch_metric, batch_metrics)
-            pos = self.total_epochs + (index + 1) / num_of_batches
-            print(f"\rEpoch: {pos:.3f}, Batch {mode} Loss: {batch_loss}, Metric: {batch_metric}", end="", flush=True)
+            self.append_batch_val(batch_loss, batch_losses), self.append_batch_val(batch_metric, batch_metrics)
+            if (index + 1) % self.log_interval == 0 or index + 1 == num_of_batches:
+                batch_loss = {name: round(float(values[-1]), 5) for name, values in batch_losses.items()}
+                batch_metric = {name: round(float(values[-1]), 5) for name, values in batch_metrics.items()}
+                pos = self.total_epochs + (index + 1) / num_of_batches
+                print(f"\rEpoch: {pos:.3f}, Batch {mode} Loss: {batch_loss}, Metric: {batch_metric}", end="",
+                      flush=True)
 
         logger.debug(f"Epoch: {self.total_epochs + 1}, Batch {mode} Duration: {self.dur_calc(start_time)}")
-        loss = {loss_name: float(np.mean(loss_values)) for loss_name, loss_values in batch_losses.items()}
-        metric = {metric_name: float(np.mean(metric_values)) for metric_name, metric_values in batch_metrics.items()}
+        loss = {loss_name: self.mean_val(loss_values) for loss_name, loss_values in batch_losses.items()}
+        metric = {metric_name: self.mean_val(metric_values) for metric_name, metric_values in batch_metrics.items()}
         return loss, metric
 
     def set_seed(self, seed: int) -> None: